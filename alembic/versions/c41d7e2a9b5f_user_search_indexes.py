@@ -0,0 +1,46 @@
+"""user search indexes
+
+Revision ID: c41d7e2a9b5f
+Revises: afd8e93b3209
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e2a9b5f'
+down_revision: Union[str, None] = 'afd8e93b3209'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # exact matches on username and email are served by their unique B-trees,
+    # name has none; prefix (ILIKE 'q%') and fuzzy (%) search use trigram GIN indexes
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_users_name', 'users', ['name'])
+    op.create_index(
+        'ix_users_username_trgm', 'users', ['username'],
+        postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_users_email_trgm', 'users', ['email'],
+        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_users_name_trgm', 'users', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_name_trgm', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_users_username_trgm', table_name='users')
+    op.drop_index('ix_users_name', table_name='users')
@@ -0,0 +1,61 @@
+'''
+Requests per second through the auth layer: BaseHTTPMiddleware vs pure ASGI.
+
+Both apps serve the same public route. The "before" app wraps it in
+BaseHTTPMiddleware with a pass-through dispatch, which is the floor of what
+the old auth_middleware cost on every request; the "after" app uses AuthMiddleware.
+
+    python -m benchmarks.bench_auth_middleware
+'''
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from main import AuthMiddleware
+
+
+REQUESTS = 5_000
+CONCURRENCY = 50
+
+
+def build_app(middleware: str) -> FastAPI:
+	app = FastAPI()
+
+	@app.get('/')
+	async def index():
+		return {'status': 'ok'}
+
+	if middleware == 'base_http':
+		async def dispatch(request, call_next):
+			return await call_next(request)
+		app.add_middleware(BaseHTTPMiddleware, dispatch=dispatch)
+	else:
+		app.add_middleware(AuthMiddleware)
+	return app
+
+
+async def requests_per_second(app: FastAPI) -> float:
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+		async def worker(count: int):
+			for _ in range(count):
+				response = await client.get('/')
+				assert response.status_code == 200
+
+		start = time.perf_counter()
+		await asyncio.gather(*(worker(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY)))
+		return REQUESTS / (time.perf_counter() - start)
+
+
+async def main():
+	before = await requests_per_second(build_app('base_http'))
+	after = await requests_per_second(build_app('asgi'))
+	print(f'BaseHTTPMiddleware {before:9.0f} req/s')
+	print(f'AuthMiddleware     {after:9.0f} req/s  ({after / before:.2f}x)')
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,89 @@
+'''
+Payload codecs on a realistic admin user listing: stdlib json vs the json
+(header-less, the current default), orjson and msgpack codecs from etc/codec.py.
+
+The plain payload is the response the db consumer sends for a page of USERS
+users; the pydantic part encodes the same users as DTOs one by one, and decodes
+them back into DTOs (the schema-aware path: pydantic validates straight from
+the JSON bytes for orjson). Median time per payload and encoded size are printed.
+
+    python -m benchmarks.bench_codecs
+'''
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from pydantic import BaseModel
+
+from etc.codec import CODECS_BY_NAME, decode
+
+
+USERS = 500
+ROUNDS = 200
+
+
+class UserDto(BaseModel):
+    id: int
+    name: str
+    email: str
+    active: bool
+    created_at: datetime
+
+
+def make_users() -> list[UserDto]:
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        UserDto(id=n, name=f'user_{n}', email=f'user_{n}@example.com', active=n % 7 != 0, created_at=started + timedelta(minutes=n))
+        for n in range(USERS)
+    ]
+
+
+def timed(fn) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1_000_000
+
+
+def report(name: str, encode_us: float, decode_us: float, size: int) -> None:
+    print(f'{name:<22} encode {encode_us:9.1f} us  decode {decode_us:9.1f} us  {size:8d} bytes')
+
+
+def main():
+    users = make_users()
+    payload = {
+        'request_id': 'bench',
+        'data': 'valid',
+        'users': [user.model_dump(mode='json') for user in users],
+    }
+
+    print(f'listing of {USERS} users as a plain dict')
+    stdlib = json.dumps(payload).encode()
+    report('stdlib json', timed(lambda: json.dumps(payload).encode()), timed(lambda: json.loads(stdlib)), len(stdlib))
+    for name, codec in CODECS_BY_NAME.items():
+        encoded = codec.encode(payload)
+        report(name, timed(lambda: codec.encode(payload)), timed(lambda: decode(encoded)), len(encoded))
+
+    print(f'\n{USERS} pydantic DTOs, one payload each, decoded back into DTOs')
+    stdlib = [json.dumps(user.model_dump(mode='json')).encode() for user in users]
+    report(
+        'stdlib json',
+        timed(lambda: [json.dumps(user.model_dump(mode='json')).encode() for user in users]),
+        timed(lambda: [UserDto.model_validate(json.loads(data)) for data in stdlib]),
+        sum(map(len, stdlib))
+    )
+    for name, codec in CODECS_BY_NAME.items():
+        encoded = [codec.encode(user) for user in users]
+        report(
+            name,
+            timed(lambda: [codec.encode(user) for user in users]),
+            timed(lambda: [decode(data, UserDto) for data in encoded]),
+            sum(map(len, encoded))
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+'''
+DB consumer throughput: one message at a time vs KeyedDispatcher.
+
+A stand-in broker yields MESSAGES records spread over USERS user ids, the way
+AIOKafkaConsumer yields already-deserialized ConsumerRecords. The handler
+sleeps for a few milliseconds to stand in for the database round trip and the
+reply to Redis. Messages/sec is printed for both loops, and the dispatcher run
+also checks that each user's messages were handled in offset order.
+
+    python -m benchmarks.bench_db_consumer_dispatch
+'''
+import asyncio
+import random
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+from etc.dispatch import KeyedDispatcher
+
+
+MESSAGES = 2000
+USERS = 200
+HANDLER_LATENCY = (0.001, 0.005)
+CONCURRENCY = 64
+
+
+class StandInBroker:
+    def __init__(self, messages: int, users: int):
+        self.records = [
+            SimpleNamespace(
+                topic='update-username-topic',
+                offset=offset,
+                key=None,
+                value={'request_id': str(offset), 'user_id': random.randrange(users)}
+            )
+            for offset in range(messages)
+        ]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self.records:
+            yield record
+
+
+def make_handler(seen: dict):
+    async def handle(record):
+        await asyncio.sleep(random.uniform(*HANDLER_LATENCY))
+        seen[record.value['user_id']].append(record.offset)
+    return handle
+
+
+async def sequential(broker: StandInBroker) -> float:
+    seen = defaultdict(list)
+    handle = make_handler(seen)
+    start = time.perf_counter()
+    async for record in broker:
+        await handle(record)
+    return time.perf_counter() - start
+
+
+async def dispatched(broker: StandInBroker) -> float:
+    seen = defaultdict(list)
+    handle = make_handler(seen)
+    dispatcher = KeyedDispatcher(CONCURRENCY)
+    start = time.perf_counter()
+    async for record in broker:
+        await dispatcher.submit(record.value['user_id'], lambda record=record: handle(record))
+    await dispatcher.join()
+    elapsed = time.perf_counter() - start
+    assert all(offsets == sorted(offsets) for offsets in seen.values()), 'per-user order violated'
+    return elapsed
+
+
+async def main():
+    broker = StandInBroker(MESSAGES, USERS)
+    for name, run in (('sequential', sequential), ('dispatched', dispatched)):
+        elapsed = await run(broker)
+        print(f'{name:<11} {MESSAGES / elapsed:9.0f} msgs/sec ({elapsed:.2f} s)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+'''
+Auth middleware overhead per request with the verified-JWT cache on and off.
+
+Drives the real app through an in-process ASGI transport (no lifespan, so no
+Redis or S3 is needed) against /auth/users/me, which only echoes the payload
+the middleware attached.
+
+    python -m benchmarks.bench_jwt_cache
+'''
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from main import app
+from src.presentation.api.auth_service.token_cache import token_cache
+from src.presentation.api.auth_service.utils import create_access_token
+
+
+REQUESTS = 2_000
+
+
+async def run(client: httpx.AsyncClient) -> float:
+	start = time.perf_counter()
+	for _ in range(REQUESTS):
+		response = await client.get('/auth/users/me')
+		assert response.status_code == 200, response.text
+	return (time.perf_counter() - start) / REQUESTS * 1_000_000
+
+
+async def main():
+	user = SimpleNamespace(id=1, name='bench', email='bench@example.com')
+	cookies = {'Bearer-token': create_access_token(user)}
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench', cookies=cookies) as client:
+		token_cache.enabled = False
+		uncached = await run(client)
+		token_cache.enabled = True
+		token_cache.clear()
+		cached = await run(client)
+	print(f'cache off {uncached:8.1f} us/request')
+	print(f'cache on  {cached:8.1f} us/request  {token_cache.metrics()}')
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,109 @@
+'''
+Latency of a log-heavy request with synchronous handlers vs the queue pipeline
+from src/utils/logger.py.
+
+Both loggers drive the handler set logging.yaml gives `logger`: a
+RotatingFileHandler with a small maxBytes, so rotation happens during the run,
+and a console StreamHandler pointed at /dev/null. The "sync" logger calls them
+on the event loop; the "queue" logger puts records on a BoundedQueueHandler
+and a DrainingQueueListener thread writes them. Each request logs LINES lines.
+
+    python -m benchmarks.bench_logging
+'''
+import asyncio
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+import httpx
+from fastapi import FastAPI
+
+from src.utils.logger import BoundedQueueHandler, DrainingQueueListener, QueuePolicy
+
+
+REQUESTS = 2_000
+CONCURRENCY = 20
+LINES = 20
+QUEUE_SIZE = 10_000
+
+FORMAT = '%(asctime)s\t%(name)s\t%(levelname)s\t%(filename)s:%(lineno)d\t%(message)s'
+
+
+def build_handlers(directory: str, name: str) -> list[logging.Handler]:
+	formatter = logging.Formatter(FORMAT, '%Y-%m-%d %H:%M:%S')
+	file_handler = RotatingFileHandler(os.path.join(directory, f'{name}.log'), maxBytes=1_048_576, backupCount=2, encoding='utf-8')
+	console = logging.StreamHandler(open(os.devnull, 'w'))
+	for handler in (file_handler, console):
+		handler.setFormatter(formatter)
+	return [file_handler, console]
+
+
+def build_app(log: logging.Logger) -> FastAPI:
+	app = FastAPI()
+
+	@app.get('/users/{user_id}')
+	async def get_user(user_id: int):
+		for line in range(LINES):
+			log.info(f'Handling user {user_id}, step {line}')
+		return {'id': user_id}
+
+	return app
+
+
+async def latencies(app: FastAPI) -> list[float]:
+	transport = httpx.ASGITransport(app=app)
+	timings = []
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+		async def worker(offset: int):
+			for n in range(REQUESTS // CONCURRENCY):
+				start = time.perf_counter()
+				response = await client.get(f'/users/{offset + n}')
+				timings.append(time.perf_counter() - start)
+				assert response.status_code == 200
+
+		await asyncio.gather(*(worker(n * REQUESTS) for n in range(CONCURRENCY)))
+	return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+	timings = sorted(timings)
+	p50 = statistics.median(timings) * 1000
+	p99 = timings[int(len(timings) * 0.99)] * 1000
+	print(f'{name:<6} p50 {p50:7.3f} ms  p99 {p99:7.3f} ms')
+
+
+async def main():
+	with tempfile.TemporaryDirectory() as directory:
+		sync_log = logging.getLogger('bench_sync')
+		sync_log.propagate = False
+		sync_log.setLevel(logging.INFO)
+		for handler in build_handlers(directory, 'sync'):
+			sync_log.addHandler(handler)
+
+		queue_log = logging.getLogger('bench_queue')
+		queue_log.propagate = False
+		queue_log.setLevel(logging.INFO)
+		handlers = build_handlers(directory, 'queue')
+		front = BoundedQueueHandler(queue.Queue(QUEUE_SIZE), QueuePolicy.DROP)
+		listener = DrainingQueueListener(front.queue, *handlers, respect_handler_level=True)
+		queue_log.addHandler(front)
+		listener.start()
+
+		print(f'{REQUESTS} requests, {LINES} log lines each')
+		report('sync', await latencies(build_app(sync_log)))
+		report('queue', await latencies(build_app(queue_log)))
+
+		start = time.perf_counter()
+		listener.stop()
+		print(f'queue drained in {(time.perf_counter() - start) * 1000:.1f} ms, dropped {front.dropped} of {front.enqueued + front.dropped} records')
+
+		for handler in sync_log.handlers + handlers:
+			handler.close()
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
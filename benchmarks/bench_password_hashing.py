@@ -0,0 +1,79 @@
+'''
+Latency of an unrelated endpoint during a login storm.
+
+A throwaway FastAPI app exposes /ping and a login endpoint that checks a bcrypt
+hash either inline on the event loop or through PasswordHasher. While LOGINS
+concurrent logins run, /ping is probed every few milliseconds; its p50/p99 is printed.
+
+    python -m benchmarks.bench_password_hashing
+'''
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from src.presentation.api.auth_service.utils import PasswordHasher, hash_password, validate_password
+
+
+LOGINS = 64
+PROBE_INTERVAL = 0.005
+PASSWORD = 'correct horse battery staple'
+
+
+def build_app(hasher: PasswordHasher, hashed: bytes) -> FastAPI:
+	app = FastAPI()
+
+	@app.get('/ping')
+	async def ping():
+		return {'status': 'ok'}
+
+	@app.post('/login/inline')
+	async def login_inline():
+		return {'valid': validate_password(PASSWORD, hashed)}
+
+	@app.post('/login/pooled')
+	async def login_pooled():
+		return {'valid': await hasher.verify(PASSWORD, hashed)}
+
+	return app
+
+
+async def storm(client: httpx.AsyncClient, login_path: str) -> list[float]:
+	latencies: list[float] = []
+	done = asyncio.Event()
+
+	async def probe():
+		while not done.is_set():
+			start = time.perf_counter()
+			await client.get('/ping')
+			latencies.append(time.perf_counter() - start)
+			await asyncio.sleep(PROBE_INTERVAL)
+
+	prober = asyncio.create_task(probe())
+	await asyncio.gather(*(client.post(login_path) for _ in range(LOGINS)))
+	done.set()
+	await prober
+	return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+	ordered = sorted(latencies)
+	p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+	print(f'{name:<8} /ping samples={len(ordered):4d} p50={statistics.median(ordered) * 1000:8.2f} ms p99={p99 * 1000:8.2f} ms')
+
+
+async def main():
+	hasher = PasswordHasher(max_queue=LOGINS)
+	hashed = hash_password(PASSWORD, hasher.rounds)
+	app = build_app(hasher, hashed)
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+		report('inline', await storm(client, '/login/inline'))
+		report('pooled', await storm(client, '/login/pooled'))
+	hasher.shutdown()
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
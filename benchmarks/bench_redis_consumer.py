@@ -0,0 +1,71 @@
+'''
+redis_service consumer throughput: a round trip per message vs one pipeline per getmany() batch.
+
+A stand-in consumer serves MESSAGES already-deserialized responses, either one
+record at a time (the previous `async for` loop, one round trip each) or in
+getmany() batches handled by KafkaConsumerClient.consume_batch(). Messages/sec
+is printed for both. Needs the Redis from SAppSettings; keys expire after the
+consumer's response TTL.
+
+    python -m benchmarks.bench_redis_consumer
+'''
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from etc.redis_service.kafka.consumer import KafkaConsumerClient
+
+
+MESSAGES = 10000
+BATCH_SIZE = 500
+
+
+def make_records(count: int) -> list:
+    return [
+        SimpleNamespace(offset=offset, value={'request_id': f'bench-{uuid.uuid4()}', 'data': 'valid', 'special': 'success'})
+        for offset in range(count)
+    ]
+
+
+class StandInConsumer:
+    def __init__(self, records: list):
+        self.records = records
+        self.position = 0
+        self.commits = 0
+
+    async def getmany(self, timeout_ms: int = 0, max_records: int = BATCH_SIZE) -> dict:
+        batch = self.records[self.position:self.position + max_records]
+        self.position += len(batch)
+        return {'add-info-to-redis[0]': batch} if batch else {}
+
+    async def commit(self):
+        self.commits += 1
+
+
+async def per_message(client: KafkaConsumerClient, records: list) -> float:
+    # the previous loop: one SET + PUBLISH round trip per message
+    start = time.perf_counter()
+    for record in records:
+        await client.event_handler(record.value)
+    return time.perf_counter() - start
+
+
+async def batched(client: KafkaConsumerClient, records: list) -> float:
+    client.consumer = StandInConsumer(records)
+    start = time.perf_counter()
+    while await client.consume_batch():
+        pass
+    return time.perf_counter() - start
+
+
+async def main():
+    client = KafkaConsumerClient(batch_size=BATCH_SIZE)
+    for name, run in (('per-message', per_message), ('batched', batched)):
+        elapsed = await run(client, make_records(MESSAGES))
+        print(f'{name:<12} {MESSAGES / elapsed:9.0f} msgs/sec ({elapsed:.2f} s)')
+    await client.redis_client.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+'''
+Request-reply latency over Redis: 100 ms GET polling vs the pub/sub dispatcher.
+
+A fake responder stores and publishes each response the way the redis_service
+consumer does, after a random delay; the time between the publish and the
+waiter returning is the delivery latency. Needs the Redis from SAppSettings.
+
+    python -m benchmarks.bench_response_delivery
+'''
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from etc.cache import RESPONSE_CHANNEL, encode_response_frame, get_response_from_cache, redis_client, wait_for_response
+from etc.codec import encode
+
+
+REQUESTS = 200
+CONCURRENCY = 20
+
+
+async def poll_for_response(request_id: str, timeout: float = 10) -> dict:
+    # the previous implementation, kept here as the baseline
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        response = await get_response_from_cache(request_id)
+        if response:
+            return response
+        await asyncio.sleep(0.1)
+    raise TimeoutError(request_id)
+
+
+async def respond(request_id: str, published_at: dict):
+    await asyncio.sleep(random.uniform(0.005, 0.05))
+    async with redis_client.pipeline(transaction=False) as pipe:
+        payload = encode('valid')
+        pipe.set(request_id, payload, ex=60)
+        pipe.publish(RESPONSE_CHANNEL, encode_response_frame(request_id, payload))
+        published_at[request_id] = time.perf_counter()
+        await pipe.execute()
+
+
+async def run(wait) -> list[float]:
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    published_at = {}
+
+    async def one():
+        async with semaphore:
+            request_id = str(uuid.uuid4())
+            responder = asyncio.create_task(respond(request_id, published_at))
+            await wait(request_id)
+            latencies.append(time.perf_counter() - published_at[request_id])
+            await responder
+
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f'{name:<8} p50={statistics.median(ordered) * 1000:7.2f} ms p99={p99 * 1000:7.2f} ms')
+
+
+async def main():
+    report('polling', await run(poll_for_response))
+    report('pub/sub', await run(wait_for_response))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
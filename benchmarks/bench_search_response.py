@@ -0,0 +1,110 @@
+'''
+Serialization of a /search/{index_name} response with 1,000 hits: FastAPI's
+JSONResponse vs FastJSONResponse on FastJSONRoute.
+
+Both apps serve the same endpoint body as main.search_documents over a canned
+Elasticsearch result, so only the response path differs. The "before" app runs
+each hit list through jsonable_encoder and json.dumps; the "after" app hands it
+to orjson directly. Render time alone and end-to-end requests per second are printed.
+
+    python -m benchmarks.bench_search_response
+'''
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.presentation.responses import FastJSONResponse, FastJSONRoute
+
+
+HITS = 1_000
+ROUNDS = 200
+REQUESTS = 500
+CONCURRENCY = 10
+
+
+def make_search_response() -> dict:
+	listed = datetime(2025, 1, 1, tzinfo=timezone.utc)
+	return {'hits': {'hits': [
+		{
+			'_id': f'laptop-{n}',
+			'_source': {
+				'title': f'Laptop {n}',
+				'brand': ('Lenovo', 'Dell', 'Asus', 'Apple')[n % 4],
+				'price': 499.0 + n,
+				'ram_gb': (8, 16, 32)[n % 3],
+				'tags': ['ultrabook', 'ssd', f'series-{n % 10}'],
+				'specs': {'cpu': f'cpu-{n % 12}', 'gpu': None, 'weight_kg': 1.2 + n % 5 / 10},
+				'listed_at': (listed + timedelta(hours=n)).isoformat(),
+			},
+		}
+		for n in range(HITS)
+	]}}
+
+
+SEARCH_RESPONSE = make_search_response()
+
+
+def build_app(fast: bool) -> FastAPI:
+	if fast:
+		app = FastAPI(default_response_class=FastJSONResponse)
+		app.router.route_class = FastJSONRoute
+	else:
+		app = FastAPI()
+
+	@app.get('/search/{index_name}')
+	async def search_documents(index_name: str):
+		hits = SEARCH_RESPONSE['hits']['hits']
+		return [{'id': hit['_id'], **hit['_source']} for hit in hits]
+
+	return app
+
+
+def render_time(render) -> float:
+	hits = [{'id': hit['_id'], **hit['_source']} for hit in SEARCH_RESPONSE['hits']['hits']]
+	timings = []
+	for _ in range(ROUNDS):
+		start = time.perf_counter()
+		render(hits)
+		timings.append(time.perf_counter() - start)
+	return statistics.median(timings) * 1000
+
+
+async def requests_per_second(app: FastAPI) -> tuple[float, bytes]:
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+		body = (await client.get('/search/laptops')).content
+
+		async def worker(count: int):
+			for _ in range(count):
+				response = await client.get('/search/laptops')
+				assert response.status_code == 200
+
+		start = time.perf_counter()
+		await asyncio.gather(*(worker(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY)))
+		return REQUESTS / (time.perf_counter() - start), body
+
+
+async def main():
+	before = render_time(lambda hits: JSONResponse(jsonable_encoder(hits)))
+	after = render_time(FastJSONResponse)
+	print(f'{HITS} hits, render only')
+	print(f'jsonable_encoder + JSONResponse {before:8.2f} ms')
+	print(f'FastJSONResponse                {after:8.2f} ms  ({before / after:.1f}x)')
+
+	before, before_body = await requests_per_second(build_app(fast=False))
+	after, after_body = await requests_per_second(build_app(fast=True))
+	assert json.loads(before_body) == json.loads(after_body)
+	print(f'\n{HITS} hits, GET /search/{{index_name}}')
+	print(f'JSONResponse     {before:8.0f} req/s')
+	print(f'FastJSONResponse {after:8.0f} req/s  ({after / before:.2f}x)')
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
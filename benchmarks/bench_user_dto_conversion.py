@@ -0,0 +1,62 @@
+'''
+Per-row overhead of turning 10k projected user rows into UserResponseDto.
+
+Rows are named tuples of USER_PUBLIC_FIELDS, which expose the same attribute
+access as the SQLAlchemy Row objects the repository returns, so no database is
+needed. Conversion compares a model_validate call per row (the old get_all),
+one TypeAdapter call for the whole list, and to_user_dtos, which constructs
+the DTOs without validation. Batching alone barely helps: EmailStr validation
+dominates the per-row cost. Serialization compares rendering the DTO list as
+a plain list vs as UserListDto.
+
+    python -m benchmarks.bench_user_dto_conversion
+'''
+import statistics
+import time
+from collections import namedtuple
+from typing import List
+
+from pydantic import TypeAdapter
+
+from src.application.repositories.PostgresRepository import USER_PUBLIC_FIELDS
+from src.application.services.UserService import to_user_dtos
+from src.presentation.dto.schemas import UserListDto, UserResponseDto
+from src.presentation.responses import FastJSONResponse
+
+
+USERS = 10_000
+ROUNDS = 30
+
+UserRow = namedtuple('UserRow', USER_PUBLIC_FIELDS)
+
+
+def timed(fn) -> float:
+	timings = []
+	for _ in range(ROUNDS):
+		start = time.perf_counter()
+		fn()
+		timings.append(time.perf_counter() - start)
+	return statistics.median(timings) * 1000
+
+
+def report(name: str, ms: float) -> None:
+	print(f'{name:<28} {ms:8.2f} ms  {ms / USERS * 1000:6.2f} us/row')
+
+
+def main():
+	rows = [UserRow(n, f'user_{n}', f'user_{n}@example.com', True) for n in range(USERS)]
+
+	print(f'{USERS} rows -> UserResponseDto')
+	report('model_validate per row', timed(lambda: [UserResponseDto.model_validate(row) for row in rows]))
+	adapter = TypeAdapter(List[UserResponseDto])
+	report('TypeAdapter over the list', timed(lambda: adapter.validate_python(rows, from_attributes=True)))
+	report('to_user_dtos', timed(lambda: to_user_dtos(rows)))
+
+	users = to_user_dtos(rows)
+	print(f'\n{USERS} DTOs -> response body')
+	report('list of DTOs', timed(lambda: FastJSONResponse(users)))
+	report('UserListDto', timed(lambda: FastJSONResponse(UserListDto.model_construct(users))))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,73 @@
+'''
+Offset vs keyset pagination of the users table.
+
+Seeds the test database from .env.test with PAGE_SIZE * LAST_PAGE users and
+times UserRepository.get_all (LIMIT/OFFSET) against get_all_after (seek on id)
+for the first and the last page.
+
+    python -m benchmarks.bench_user_pagination
+'''
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config.settings import TestSettings
+from src.application.repositories.PostgresRepository import UserRepository
+from src.infrastructure.db.models import Base, UserOrm
+
+
+PAGE_SIZE = 10
+LAST_PAGE = 10_000
+ROUNDS = 50
+
+SEED_USERS = text('''
+	INSERT INTO users (username, hashed_password, email, active, role)
+	SELECT 'user_' || n, '\\x00'::bytea, 'user_' || n || '@example.com', true, 'user'
+	FROM generate_series(1, :count) AS n
+''')
+
+
+async def measure(session_maker, fetch) -> float:
+	timings = []
+	for _ in range(ROUNDS):
+		async with session_maker() as session:
+			repo = UserRepository(session, UserOrm)
+			start = time.perf_counter()
+			await fetch(repo)
+			timings.append(time.perf_counter() - start)
+	return statistics.median(timings) * 1000
+
+
+async def main():
+	engine = create_async_engine(TestSettings.test_async_pg_url)
+	session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+	async with engine.begin() as conn:
+		await conn.run_sync(Base.metadata.drop_all)
+		await conn.run_sync(Base.metadata.create_all)
+		await conn.execute(SEED_USERS, {'count': PAGE_SIZE * LAST_PAGE})
+		await conn.execute(text('ANALYZE users'))
+
+	last_offset = PAGE_SIZE * (LAST_PAGE - 1)
+	# keyset cursor of the last page is the id of the last row on the previous one
+	last_after_id = last_offset
+
+	results = {
+		'offset page 1': await measure(session_maker, lambda repo: repo.get_all(0, PAGE_SIZE)),
+		f'offset page {LAST_PAGE}': await measure(session_maker, lambda repo: repo.get_all(last_offset, PAGE_SIZE)),
+		'keyset page 1': await measure(session_maker, lambda repo: repo.get_all_after(None, PAGE_SIZE)),
+		f'keyset page {LAST_PAGE}': await measure(session_maker, lambda repo: repo.get_all_after(last_after_id, PAGE_SIZE)),
+	}
+	for name, ms in results.items():
+		print(f'{name:<20} {ms:8.3f} ms (median of {ROUNDS})')
+
+	async with engine.begin() as conn:
+		await conn.run_sync(Base.metadata.drop_all)
+	await engine.dispose()
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,66 @@
+'''
+ORM entities vs projected rows on the user read path.
+
+Seeds the test database from .env.test and times fetching a page of users
+as tracked UserOrm instances and as Row tuples of USER_PUBLIC_FIELDS,
+both including the conversion to UserResponseDto.
+
+    python -m benchmarks.bench_user_projection
+'''
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config.settings import TestSettings
+from src.application.repositories.PostgresRepository import USER_PUBLIC_FIELDS, UserRepository
+from src.infrastructure.db.models import Base, UserOrm
+from src.presentation.dto.schemas import UserResponseDto
+
+
+USERS = 10_000
+PAGE_SIZE = 1_000
+ROUNDS = 30
+
+SEED_USERS = text('''
+	INSERT INTO users (username, hashed_password, email, active, role)
+	SELECT 'user_' || n, convert_to(repeat('x', 60), 'UTF8'), 'user_' || n || '@example.com', true, 'user'
+	FROM generate_series(1, :count) AS n
+''')
+
+
+async def measure(session_maker, projection) -> float:
+	timings = []
+	for _ in range(ROUNDS):
+		async with session_maker() as session:
+			repo = UserRepository(session, UserOrm)
+			start = time.perf_counter()
+			rows = await repo.get_all(0, PAGE_SIZE, projection=projection)
+			[UserResponseDto.model_validate(row) for row in rows]
+			timings.append(time.perf_counter() - start)
+	return statistics.median(timings) * 1000
+
+
+async def main():
+	engine = create_async_engine(TestSettings.test_async_pg_url)
+	session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+	async with engine.begin() as conn:
+		await conn.run_sync(Base.metadata.drop_all)
+		await conn.run_sync(Base.metadata.create_all)
+		await conn.execute(SEED_USERS, {'count': USERS})
+
+	orm_ms = await measure(session_maker, None)
+	row_ms = await measure(session_maker, USER_PUBLIC_FIELDS)
+	print(f'ORM entities   {orm_ms:8.3f} ms  {orm_ms / PAGE_SIZE * 1000:6.2f} us/row')
+	print(f'projected rows {row_ms:8.3f} ms  {row_ms / PAGE_SIZE * 1000:6.2f} us/row')
+
+	async with engine.begin() as conn:
+		await conn.run_sync(Base.metadata.drop_all)
+	await engine.dispose()
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,107 @@
+'''
+UserRepository.search_users on one million users, with and without the search indexes.
+
+Seeds the test database from .env.test with USERS synthetic users (pg_trgm must
+be installable there), then times exact, prefix and fuzzy searches by username
+with the unique B-tree and the trigram GIN index in place, and again after
+dropping them so Postgres falls back to a sequential scan. The plan of every
+query is printed once so the index use can be checked.
+
+    python -m benchmarks.bench_user_search
+'''
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config.settings import TestSettings
+from src.application.repositories.PostgresRepository import UserRepository, USER_PUBLIC_FIELDS
+from src.infrastructure.db.models import Base, UserOrm
+from src.utils.search import SearchMode, search_clause
+
+
+USERS = 1_000_000
+PAGE_SIZE = 20
+ROUNDS = 20
+
+SEED_USERS = text('''
+	INSERT INTO users (username, hashed_password, email, active, role)
+	SELECT 'user_' || md5(n::text), '\\x00'::bytea, 'user_' || n || '@example.com', true, 'user'
+	FROM generate_series(1, :count) AS n
+''')
+
+DROP_INDEXES = (
+	'DROP INDEX ix_users_username_trgm',
+	'ALTER TABLE users DROP CONSTRAINT users_username_key',
+)
+
+
+async def pick_queries(session_maker) -> dict:
+	async with session_maker() as session:
+		username = (await session.execute(text('SELECT username FROM users WHERE id = :id'), {'id': USERS // 2})).scalar_one()
+	return {
+		SearchMode.EXACT: username,
+		SearchMode.PREFIX: username[:9],
+		# a typo in the middle of the name
+		SearchMode.FUZZY: username[:12] + 'x' + username[13:],
+	}
+
+
+async def explain(session_maker, mode: SearchMode, query: str) -> str:
+	statement = (
+		UserRepository(None, UserOrm)._select(USER_PUBLIC_FIELDS)
+		.where(search_clause(UserOrm.username, query, mode))
+		.order_by(UserOrm.id).limit(PAGE_SIZE)
+	)
+	async with session_maker() as session:
+		compiled = statement.compile(session.bind, compile_kwargs={'literal_binds': True})
+		plan = await session.execute(text(f'EXPLAIN {compiled}'))
+		return ' / '.join(line for line in plan.scalars() if 'Scan' in line).strip()
+
+
+async def measure(session_maker, mode: SearchMode, query: str) -> float:
+	timings = []
+	for _ in range(ROUNDS):
+		async with session_maker() as session:
+			repo = UserRepository(session, UserOrm)
+			start = time.perf_counter()
+			await repo.search_users('username', query, mode, limit=PAGE_SIZE, projection=USER_PUBLIC_FIELDS)
+			timings.append(time.perf_counter() - start)
+	return statistics.median(timings) * 1000
+
+
+async def run(session_maker, label: str, queries: dict):
+	for mode, query in queries.items():
+		ms = await measure(session_maker, mode, query)
+		print(f'{label:<10} {mode.value:<7} {ms:9.3f} ms (median of {ROUNDS})  {await explain(session_maker, mode, query)}')
+
+
+async def main():
+	engine = create_async_engine(TestSettings.test_async_pg_url)
+	session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+	async with engine.begin() as conn:
+		await conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+		await conn.run_sync(Base.metadata.drop_all)
+		await conn.run_sync(Base.metadata.create_all)
+		await conn.execute(SEED_USERS, {'count': USERS})
+		await conn.execute(text('ANALYZE users'))
+
+	queries = await pick_queries(session_maker)
+	await run(session_maker, 'indexed', queries)
+
+	async with engine.begin() as conn:
+		for statement in DROP_INDEXES:
+			await conn.execute(text(statement))
+		await conn.execute(text('ANALYZE users'))
+	await run(session_maker, 'seq scan', queries)
+
+	async with engine.begin() as conn:
+		await conn.run_sync(Base.metadata.drop_all)
+	await engine.dispose()
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
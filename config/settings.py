@@ -44,6 +44,29 @@ class AppSettings(BaseSettings):
     def postgres_sync_url(self) -> str:
         return f'postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_name}'
 
+    postgres_replica_hosts: str = Field("", env="postgres_replica_hosts")
+    postgres_replica_strategy: str = Field("round_robin", env="postgres_replica_strategy")
+    postgres_replica_retry_seconds: float = Field(30, env="postgres_replica_retry_seconds")
+
+    @property
+    def postgres_replica_async_urls(self) -> list[str]:
+         hosts = [host.strip() for host in self.postgres_replica_hosts.split(',') if host.strip()]
+         return [
+              f'postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}@{host}/{self.postgres_name}'
+              for host in hosts
+         ]
+
+    postgres_echo: bool = Field(False, env="postgres_echo")
+    postgres_pool_size: int = Field(10, env="postgres_pool_size")
+    postgres_max_overflow: int = Field(20, env="postgres_max_overflow")
+    postgres_pool_timeout: float = Field(30, env="postgres_pool_timeout")
+    postgres_pool_recycle: int = Field(1800, env="postgres_pool_recycle")
+    postgres_pool_pre_ping: bool = Field(True, env="postgres_pool_pre_ping")
+    postgres_statement_cache_size: int = Field(100, env="postgres_statement_cache_size")
+    postgres_statement_timeout_ms: int = Field(30000, env="postgres_statement_timeout_ms")
+    postgres_command_timeout: float = Field(60, env="postgres_command_timeout")
+    postgres_bulk_chunk_size: int = Field(1000, env="postgres_bulk_chunk_size")
+
 
     admin_name: str = Field(..., env="admin_username")
     admin_password: str = Field(..., env="admin_password")
@@ -54,6 +77,12 @@ class AppSettings(BaseSettings):
     access_token_expire_minutes: int = Field(..., env="access_token_expire_minutes")
     refresh_token_expire_minutes: int = Field(..., env="refresh_token_expire_minutes")
     
+    jwt_cache_enabled: bool = Field(True, env="jwt_cache_enabled")
+    jwt_cache_size: int = Field(10000, env="jwt_cache_size")
+    bcrypt_rounds: int = Field(12, env="bcrypt_rounds")
+    password_hash_workers: int = Field(4, env="password_hash_workers")
+    password_hash_max_queue: int = Field(64, env="password_hash_max_queue")
+    
     @property
     def jwt_private_key_path(*args, **kwargs):
         return BASE_DIR / "certs" / "jwt-private.pem"
@@ -83,6 +112,19 @@ class AppSettings(BaseSettings):
     app_version: str = Field(..., env="app_version")
     log_level: str = Field("INFO", env="log_level")
     log_file: str = Field("logs/app.log", env="log_file")
+    log_queue_size: int = Field(10000, env="log_queue_size")
+    log_queue_policy: str = Field("drop", env="log_queue_policy")
+    log_queue_block_timeout: float = Field(0.1, env="log_queue_block_timeout")
+    # "text" writes only the tab-separated lines, "json" also one JSON object per line to log_json_file
+    log_format: str = Field("text", env="log_format")
+    log_json_file: str = Field("logs/app.ndjson", env="log_json_file")
+    logstash_enabled: bool = Field(False, env="logstash_enabled")
+    logstash_host: str = Field("logstash", env="logstash_host")
+    logstash_port: int = Field(50000, env="logstash_port")
+    logstash_batch_size: int = Field(500, env="logstash_batch_size")
+    logstash_flush_interval: float = Field(1.0, env="logstash_flush_interval")
+    logstash_buffer_path: str = Field("logs/logstash-buffer.ndjson", env="logstash_buffer_path")
+    logstash_buffer_max_bytes: int = Field(33554432, env="logstash_buffer_max_bytes")
     external_api_url: str = Field(..., env="external_api_url")
 
     model_config = SettingsConfigDict(
@@ -1,18 +1,20 @@
 # FastAPI
-from fastapi import FastAPI, Security
+from fastapi import FastAPI, HTTPException, Security
 
 # External libraries
 import uuid
 import json
 
 # Internal services and dependencies
+from etc.producer import producer_lifespan
 from services.admin_service.kafka.producer import admin_kafka_producer
 from services.auth_service.service.depends import admin_required
 from services.admin_service.service.schemas import SearchUserByIdSchema, SearchUserByNameSchema, SearchUserByEmailSchema
 from services.admin_service.service.depends import PaginationDep
 
 # Integrations
-from etc.cache import wait_for_response, cache_result
+from etc.cache import wait_for_response, cache_result, single_flight_cache
+from backend.src.utils.cache_invalidation import USERS_CACHE_TAG
 
 # Configurations
 from backend.src.utils.logger import laptop_logger
@@ -20,13 +22,17 @@ from config.settings import SAppSettings
 
 
 
-admin_service_holder = FastAPI(title='Admin Service')
+admin_service_holder = FastAPI(lifespan=producer_lifespan(admin_kafka_producer), title='Admin Service')
 
 TOPICS = SAppSettings.kafka_topics
 
+# admin listings are hot; a few seconds in process memory spares most Redis reads,
+# changes to users evict them through the cache invalidation channel
+USERS_L1_TTL = 5
+
 
 @admin_service_holder.get('/users/all', tags=['Admin Routes'], dependencies=[Security(admin_required)])
-@cache_result
+@cache_result(l1_ttl=USERS_L1_TTL, tags=(USERS_CACHE_TAG,))
 async def get_all_users(pagination: PaginationDep):
     try:
         offset = pagination.offset
@@ -37,9 +43,8 @@ async def get_all_users(pagination: PaginationDep):
         message = {'request_id': request_id, 'limit': limit, 'offset': offset}
         topic_key = 'admin_get_all_users'
 
-        async with admin_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.info('Message sent to kafka')
+        await admin_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info('Message sent to kafka')
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in admin: {response_data}")
@@ -71,22 +76,28 @@ async def get_all_users(pagination: PaginationDep):
     
 
 
+def raise_for_service_error(response_data) -> None:
+    # raised rather than returned, so cache_result does not keep the failure
+    if isinstance(response_data, dict) and response_data.get('error'):
+        raise HTTPException(status_code=503, detail=response_data['error'])
+
+
 @admin_service_holder.post('/users/search/name', tags=['Admin Routes'], dependencies=[Security(admin_required)])
-@cache_result
+@cache_result(l1_ttl=USERS_L1_TTL, tags=(USERS_CACHE_TAG,))
 async def search_users_name(data: SearchUserByNameSchema, pagination: PaginationDep):
     try:
         request_id = str(uuid.uuid4())
         limit = pagination.limit
         offset = pagination.offset
-        message = {'request_id': request_id, 'search_query': data.search_query, 'search_type': 'name', 'limit': limit, 'offset': offset}
+        message = {'request_id': request_id, 'search_query': data.search_query, 'search_type': 'name', 'mode': data.mode, 'limit': limit, 'offset': offset, 'after_id': pagination.after_id}
         topic_key = 'admin_search_users'
         
-        async with admin_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.info('Message sent to kafka')
+        await admin_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info('Message sent to kafka')
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in admin: {response_data}")
+        raise_for_service_error(response_data)
         
         if isinstance(response_data, str):
             try:
@@ -114,7 +125,7 @@ async def search_users_name(data: SearchUserByNameSchema, pagination: Pagination
 
 
 @admin_service_holder.post('/users/search/email', tags=['Admin Routes'], dependencies=[Security(admin_required)])
-@cache_result
+@cache_result(l1_ttl=USERS_L1_TTL, tags=(USERS_CACHE_TAG,))
 async def search_users_email(data: SearchUserByEmailSchema, pagination: PaginationDep):
     try:
         request_id = str(uuid.uuid4())
@@ -125,18 +136,20 @@ async def search_users_email(data: SearchUserByEmailSchema, pagination: Paginati
             'request_id': request_id,
             'search_query': data.search_query,
             'search_type': 'email',
+            'mode': data.mode,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'after_id': pagination.after_id
         }
 
         topic = 'admin_search_users'
 
-        async with admin_kafka_producer as producer:
-            await producer.send_message(topic, message)
-            laptop_logger.info('Message sent to kafka')
+        await admin_kafka_producer.send_message(topic, message)
+        laptop_logger.info('Message sent to kafka')
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in admin: {response_data}")
+        raise_for_service_error(response_data)
         laptop_logger.info(f"Type of response_data: {type(response_data)}")
 
         if response_data is None:
@@ -170,7 +183,7 @@ async def search_users_email(data: SearchUserByEmailSchema, pagination: Paginati
     
 
 @admin_service_holder.post('/users/search/id', tags=['Admin Routes'], dependencies=[Security(admin_required)])
-@cache_result
+@cache_result(l1_ttl=USERS_L1_TTL, tags=(USERS_CACHE_TAG,))
 async def search_users_id(data: SearchUserByIdSchema, pagination: PaginationDep):
     try:
         request_id = str(uuid.uuid4())
@@ -182,16 +195,17 @@ async def search_users_id(data: SearchUserByIdSchema, pagination: PaginationDep)
             'search_query': data.search_query,
             'search_type': 'id',
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'after_id': pagination.after_id
         }
 
         topic = 'admin_search_users'
 
-        async with admin_kafka_producer as producer:
-            await producer.send_message(topic, message)
+        await admin_kafka_producer.send_message(topic, message)
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in admin: {response_data}")
+        raise_for_service_error(response_data)
         laptop_logger.info(f"Type of response_data: {type(response_data)}")
 
         if response_data is None:
@@ -220,4 +234,15 @@ async def search_users_id(data: SearchUserByIdSchema, pagination: PaginationDep)
 
     except Exception as e:
         laptop_logger.error(f"Error when searching users by id: {e}")
-        raise  # GetUsersByIdException
\ No newline at end of file
+        raise  # GetUsersByIdException
+
+
+
+@admin_service_holder.get('/metrics/cache', tags=['Admin Routes'], dependencies=[Security(admin_required)])
+async def cache_metrics():
+    return single_flight_cache.metrics()
+
+
+@admin_service_holder.get('/metrics/kafka-producer', tags=['Admin Routes'], dependencies=[Security(admin_required)])
+async def kafka_producer_metrics():
+    return admin_kafka_producer.metrics()
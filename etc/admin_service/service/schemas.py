@@ -1,14 +1,22 @@
-from pydantic import BaseModel, EmailStr, Field
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+SearchMode = Literal['exact', 'prefix', 'fuzzy']
 
 class SearchUserByEmailSchema(BaseModel):
-	search_query: EmailStr
+	# a full address for exact search, any fragment for prefix/fuzzy
+	search_query: str
+	mode: SearchMode = 'exact'
 
 class SearchUserByNameSchema(BaseModel):
 	search_query: str
+	mode: SearchMode = 'exact'
 
 class SearchUserByIdSchema(BaseModel):
 	search_query: int
 
 class UserPaginationSchema(BaseModel):
 	offset: int = Field(0, ge=0, description="Offset for pagination")
-	limit: int = Field(5, gt=0, le=100, description="Number of items maximum to return")
\ No newline at end of file
+	limit: int = Field(5, gt=0, le=100, description="Number of items maximum to return")
+	after_id: Optional[int] = Field(None, ge=0, description="Last id of the previous page, used instead of offset")
\ No newline at end of file
@@ -5,8 +5,8 @@ from fastapi import HTTPException
 from backend.src.utils.logger import laptop_logger
 
 # External libraries
-import json
 from aiokafka import AIOKafkaConsumer
+from etc.codec import CodecError, decode
 
 # Services and dependencies
 from services.auth_service.service.depends import decode_jwt_token, extract_token
@@ -22,9 +22,10 @@ LOCAL_TOPICS = {
 
 
 class KafkaConsumerClient:
-    def __init__(self, topics: dict, broker_url: str = SAppSettings.kafka_broker_url):
+    def __init__(self, topics: dict, broker_url: str = SAppSettings.kafka_broker_url, group_id: str = 'auth-service'):
         self.broker_url = broker_url
         self.topics = topics
+        self.group_id = group_id
         self.consumer = None
 
     async def start(self, topics: list):
@@ -32,6 +33,7 @@ class KafkaConsumerClient:
         self.consumer = AIOKafkaConsumer(
             *topics,
             bootstrap_servers=self.broker_url,
+            group_id=self.group_id,
             value_deserializer=self.deserializer
         )
         
@@ -43,16 +45,15 @@ class KafkaConsumerClient:
 
     def deserializer(self, serialized):
         if isinstance(serialized, dict):
-            laptop_logger.debug(f"Received msg as dict: {serialized}")
             return serialized
-        else:
-            laptop_logger.debug(f"Received msg as string: {serialized}")
-            return json.loads(serialized)
+        try:
+            return decode(serialized)
+        except CodecError:
+            return None
 
     async def event_handler(self, value, topic: str):
         if topic == 'get-user-id-topic':
-            laptop_logger.info(f"Handling get-user-id: {value}")
-            value = self.deserializer(value)
+            laptop_logger.debug(f"Handling get-user-id: {value}")
             await self.handle_get_user_id(value)
         else:
             laptop_logger.warning(f"Received message from unknown topic: {topic}")
@@ -83,9 +84,8 @@ class KafkaConsumerClient:
                                    }
               topic_key = 'add_info_to_redis'
               
-              async with auth_kafka_producer as producer:
-                   await producer.send_message(topic_key, response_data)
-                   laptop_logger.debug(f'Sent response for get-user-id - {user_id} to redis service')
+              await auth_kafka_producer.send_message(topic_key, response_data)
+              laptop_logger.debug(f'Sent response for get-user-id - {user_id} to redis service')
                    
          except Exception as e:
               laptop_logger.error(f"An error fetching user id from token: {e}")
@@ -107,5 +107,8 @@ auth_kafka_consumer = KafkaConsumerClient(LOCAL_TOPICS)
 
 async def run_auth_consumer():
     laptop_logger.info('Auth consumer started')
-    await auth_kafka_consumer.consume_messages()
+    try:
+        await auth_kafka_consumer.consume_messages()
+    finally:
+        await auth_kafka_producer.stop()
     laptop_logger.info('Stopping auth kafka consumer')
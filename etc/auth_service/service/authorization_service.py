@@ -28,11 +28,12 @@ from .exc import (
 from etc.cache import wait_for_response
 
 # Kafka
+from etc.producer import producer_lifespan
 from services.auth_service.kafka.producer import auth_kafka_producer
 
 
 
-auth_service_holder = FastAPI(title="Authorization Service")
+auth_service_holder = FastAPI(lifespan=producer_lifespan(auth_kafka_producer), title="Authorization Service")
 
 add_all_auth_exceptions(auth_service_holder)
 
@@ -49,9 +50,8 @@ async def add_user(data: RegiesterUserSchema) -> dict:
         topic_key = 'user_registration'
         message = {'request_id': request_id, 'data': data.model_dump()}
         laptop_logger.info(message)
-        async with auth_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.info('Message sent to Kafka')
+        await auth_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info('Message sent to Kafka')
         response = await wait_for_response(request_id)
         if response == 'valid':
             return {'status': 'success'}
@@ -105,9 +105,8 @@ async def user_login(creds: LoginUserSchema, response: Response, request: Reques
     topic_key = 'user_logging_in'
     
     try:
-        async with auth_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.info(f"Login request sent to Kafka with request_id: {request_id}")
+        await auth_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info(f"Login request sent to Kafka with request_id: {request_id}")
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in auth: {response_data}")
@@ -168,4 +167,9 @@ async def logout(response: Response) -> Dict[str, Any]:
         }
     except Exception as e:
         laptop_logger.error(f'Unexpected error during logout: {e}')
-        raise InvalidTokenException
\ No newline at end of file
+        raise InvalidTokenException
+
+
+@auth_service_holder.get('/metrics/kafka-producer', tags=['Metrics'], dependencies=[Security(admin_required)])
+async def kafka_producer_metrics():
+    return auth_kafka_producer.metrics()
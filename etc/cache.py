@@ -1,8 +1,17 @@
 import asyncio
-import datetime
+import hashlib
+import inspect
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from enum import Enum
 from functools import wraps
+from typing import Any, Callable
 from aiokafka import AIOKafkaProducer
 from aiokafka.errors import KafkaError
+import orjson
 import redis.asyncio as redis
 from fastapi import HTTPException
 import json
@@ -10,73 +19,519 @@ from config.logging_config import laptop_logger
 import json
 from functools import wraps
 from config.settings import SAppSettings
+from backend.src.utils.cache_invalidation import CACHE_INVALIDATION_CHANNEL, cache_generation_key
+from etc.codec import CODECS, CodecError, decode, encode
 
 
-redis_client = redis.from_url(SAppSettings.redis_url, decode_responses=True)
+# values are codec payloads (etc/codec.py), binary
+redis_client = redis.from_url(SAppSettings.redis_url)
+
+RESPONSE_CHANNEL = 'redis-service-responses'
+
+
+def encode_response_frame(request_id: str, payload: bytes) -> bytes:
+    '''
+    Notification for a stored response. Header-less JSON payloads are published
+    in the legacy `{"request_id": ..., "data": ...}` envelope, which listeners
+    from before the codec layer still parse; other codecs as the request_id,
+    NUL, then the stored payload as is.
+    '''
+    if payload[:1] not in CODECS:
+        return orjson.dumps({'request_id': request_id, 'data': orjson.Fragment(payload)})
+    return request_id.encode() + b'\x00' + payload
+
+
+def decode_response_frame(frame: bytes) -> tuple[str, Callable[[], Any]]:
+    '''Returns the request_id and a function decoding the response, so unwanted responses are not decoded'''
+    request_id, separator, payload = frame.partition(b'\x00')
+    if separator:
+        return request_id.decode(), lambda: decode(payload)
+    # JSON escapes control characters, so a frame without NUL is a legacy envelope
+    envelope = decode(frame)
+    if not isinstance(envelope, dict) or 'request_id' not in envelope:
+        raise CodecError('Response notification without a request_id')
+    return envelope['request_id'], lambda: envelope.get('data')
+
 
 async def get_response_from_cache(request_id: str) -> dict:
     response = await redis_client.get(request_id)
     if response:
-        laptop_logger.info(f'Awaited response from Redis: {response}')
+        laptop_logger.debug(f'Awaited response from Redis for {request_id}')
         try:
-            return json.loads(response)
-        except Exception as e:
+            return decode(response)
+        except CodecError as e:
             laptop_logger.error(f"Error deserializing response from Redis: {e}")
     return None
 
 
+class ResponseDispatcher:
+    '''
+    One shared pub/sub subscription for the whole process. The redis_service consumer
+    SETs the response under its request_id and then PUBLISHes it on RESPONSE_CHANNEL;
+    the listener resolves the future registered for that request_id.
+    A waiter registers its future before checking the key once, so a response
+    published before the wait started is still picked up from the stored value.
+    '''
+
+    def __init__(self, client: redis.Redis, channel: str = RESPONSE_CHANNEL):
+        self._client = client
+        self._channel = channel
+        self._futures: dict[str, asyncio.Future] = {}
+        self._listener: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+
+    async def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._subscribed = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+        await self._subscribed.wait()
+
+    async def _listen(self):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self._channel)
+            self._subscribed.set()
+            async for message in pubsub.listen():
+                try:
+                    request_id, load = decode_response_frame(message['data'])
+                    future = self._futures.get(request_id)
+                    # other processes' responses are skipped without decoding them
+                    if future is not None and not future.done():
+                        future.set_result(load())
+                except CodecError as e:
+                    laptop_logger.error(f"Malformed response notification: {e}")
+        except Exception as e:
+            laptop_logger.error(f"Response listener stopped: {e}")
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            self._subscribed.set()
+            await pubsub.aclose()
+
+    async def wait(self, request_id: str, timeout: float) -> dict:
+        await self._ensure_listener()
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        try:
+            stored = await get_response_from_cache(request_id)
+            if stored is not None:
+                return stored
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._futures.pop(request_id, None)
+
+
+response_dispatcher = ResponseDispatcher(redis_client)
+
+
 async def wait_for_response(request_id: str, timeout: int = SAppSettings.redis_timeout) -> dict:
-    start = datetime.datetime.now()
-    while (datetime.datetime.now() - start).total_seconds() < timeout:
-        response_data = await get_response_from_cache(request_id)
-        if response_data:
-            return response_data
-        await asyncio.sleep(0.1)
-
-    raise HTTPException(status_code=504, detail="Timeout waiting for response to appear in Redis")
-
-
-def generate_cache_key(func_name, **kwargs):
-    key = f"{func_name}"
-    for param_name, param_value in sorted(kwargs.items()):
-        key += f":{param_value}"
-    return key
-
-
-def cache_result(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        
-        key = generate_cache_key(func.__name__, **kwargs)
-        laptop_logger.info(f'Generated cache key: {key}')
-        
-        cached_result = await redis_client.get(key)
-        if cached_result:
-            laptop_logger.info(f'Using cached result: {cached_result}')
-            return json.loads(cached_result)
-            
-        result = await func(*args, **kwargs)
-        
-        if isinstance(result, (list, int, dict)):
-            laptop_logger.info(f'Caching result: {result}')
-            await redis_client.set(key, json.dumps(result), ex=60)
-        elif isinstance(result, str):
-            laptop_logger.info('No users found to cache') # later union
+    try:
+        return await response_dispatcher.wait(request_id, timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timeout waiting for response to appear in Redis")
+
+
+CACHE_KEY_PREFIX = 'cache'
+
+
+def normalize_cache_param(value):
+    '''
+    Canonical JSON-compatible form of a parameter: equal values normalize equally
+    whatever their type, field or insertion order.
+    '''
+    if hasattr(value, 'model_dump'):
+        return normalize_cache_param(value.model_dump(mode='json'))
+    if isinstance(value, Enum):
+        return normalize_cache_param(value.value)
+    if isinstance(value, dict):
+        return {str(key): normalize_cache_param(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_cache_param(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((normalize_cache_param(item) for item in value), key=canonical_json)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def canonical_json(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def build_cache_key(namespace: str, params: dict, version: int = 1, generations: tuple = ()) -> str:
+    '''
+    `cache:<namespace>:v<version>:g<generations>:<blake2b-128 of the params>`.
+    Bumping version retires a key layout on deploy, a tag generation retires
+    every result depending on that tag at runtime.
+    '''
+    digest = hashlib.blake2b(canonical_json(normalize_cache_param(params)).encode(), digest_size=16).hexdigest()
+    generation = '.'.join(str(value) for value in generations) or '0'
+    return f'{CACHE_KEY_PREFIX}:{namespace}:v{version}:g{generation}:{digest}'
+
+
+DEFAULT_CACHE_TTL = 60
+DEFAULT_CACHE_JITTER = 0.1
+DEFAULT_XFETCH_BETA = 1.0
+CACHE_LOCK_PREFIX = 'lock:'
+
+# deletes the lock only if it still holds our token, so an expired lease taken over
+# by another process is never released by us
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def is_cacheable(result) -> bool:
+    return isinstance(result, (list, int, dict))
+
+
+class LocalCache:
+    '''
+    In-process L1: an LRU bounded by entry count, each entry with its own TTL.
+    Values are kept as decoded objects and handed out as is, so callers must not
+    mutate them. Entries are grouped by tag for invalidation; the footprint is
+    estimated from the size of each value's encoded payload.
+    '''
+
+    def __init__(self, max_entries: int = 1024, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        # key -> (value, expires_at, tags, size)
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        '''Returns (True, value) on a hit, (False, None) otherwise'''
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= self._clock():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def set(self, key: str, value, ttl: float, tags: tuple = (), size: int | None = None):
+        if key in self._entries:
+            self._remove(key)
+        if size is None:
+            size = len(encode(value))
+        self._entries[key] = (value, self._clock() + ttl, tags, size)
+        self.size_bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, tags, size = self._entries.pop(key)
+        self.size_bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate_tag(self, tag: str):
+        for key in list(self._tags.get(tag, ())):
+            self._remove(key)
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.size_bytes = 0
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'size_bytes': self.size_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SingleFlightCache:
+    '''
+    Read-through cache on Redis that recomputes every key at most once at a time.
+    Inside the process concurrent misses await the same future; across processes
+    the computing caller holds a short `lock:<key>` lease, the others poll for the
+    value until the lease runs out. Entries carry how long they took to compute,
+    so a reader can refresh them early with probability growing towards expiry
+    (XFetch), before the whole fleet misses at once.
+
+    Functions cached with an l1_ttl are also kept in the in-process LocalCache.
+    Keys embed the generation of their tags; the CacheInvalidator
+    (src/utils/cache_invalidation.py) bumps it and publishes the tag, and the
+    listener here evicts the local copies and the memoized generation.
+    '''
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        local: LocalCache | None = None,
+        lock_lease: float = 5.0,
+        lock_poll_interval: float = 0.05,
+        invalidation_channel: str = CACHE_INVALIDATION_CHANNEL
+    ):
+        self._client = client
+        self.local = local if local is not None else LocalCache()
+        self.lock_lease = lock_lease
+        self.lock_poll_interval = lock_poll_interval
+        self._invalidation_channel = invalidation_channel
+        self._release_lock = client.register_script(RELEASE_LOCK_SCRIPT)
+        self._inflight: dict[str, asyncio.Future] = {}
+        # tag -> generation, trusted only while the invalidation listener runs
+        self._generations: dict[str, int] = {}
+        self._listener: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.early_refreshes = 0
+        self.lock_waits = 0
+
+    async def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._subscribed = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+        await self._subscribed.wait()
+
+    async def _listen(self):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self._invalidation_channel)
+            self._subscribed.set()
+            async for message in pubsub.listen():
+                tag = message['data'].decode()
+                self._generations.pop(tag, None)
+                self.local.invalidate_tag(tag)
+                laptop_logger.debug(f"Evicted local cache entries tagged {tag}")
+        except Exception as e:
+            # without notifications local entries could go stale, stop serving them
+            laptop_logger.error(f"Cache invalidation listener stopped: {e}")
+            self._generations.clear()
+            self.local.clear()
+            raise
+        finally:
+            self._subscribed.set()
+            await pubsub.aclose()
+
+    async def generations(self, tags: tuple) -> tuple:
+        if not tags:
+            return ()
+        await self._ensure_listener()
+        missing = [tag for tag in tags if tag not in self._generations]
+        if missing:
+            values = await self._client.mget([cache_generation_key(tag) for tag in missing])
+            for tag, value in zip(missing, values):
+                self._generations[tag] = int(value or 0)
+        return tuple(self._generations[tag] for tag in tags)
+
+    @staticmethod
+    def should_refresh(entry: dict, beta: float) -> bool:
+        '''XFetch: now - delta * beta * ln(U) >= expiry, with U uniform in (0, 1]'''
+        return time.time() - entry['delta'] * beta * math.log(1.0 - random.random()) >= entry['expires_at']
+
+    async def read(self, key: str) -> dict | None:
+        raw = await self._client.get(key)
+        if raw is None:
+            return None
+        try:
+            entry = decode(raw)
+        except CodecError as e:
+            laptop_logger.error(f"Error deserializing cached value for {key}: {e}")
+            return None
+        if not isinstance(entry, dict) or 'value' not in entry:
+            # written before entries carried XFetch metadata, never refreshed early
+            return {'value': entry, 'delta': 0.0, 'expires_at': float('inf')}
+        return entry
+
+    async def write(self, key: str, value, delta: float, ttl: float, jitter: float):
+        ttl = ttl * (1 + random.uniform(-jitter, jitter))
+        entry = {'value': value, 'delta': delta, 'expires_at': time.time() + ttl}
+        await self._client.set(key, encode(entry), px=max(1, int(ttl * 1000)))
+
+    def _keep_local(self, key: str, value, l1_ttl: float | None, tags: tuple, expires_at: float | None = None):
+        if not l1_ttl:
+            return
+        if expires_at is not None:
+            # never keep the L1 copy past the L2 entry's expiry
+            l1_ttl = min(l1_ttl, expires_at - time.time())
+            if l1_ttl <= 0:
+                return
+        self.local.set(key, value, l1_ttl, tags)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute,
+        ttl: float,
+        jitter: float,
+        beta: float,
+        l1_ttl: float | None = None,
+        tags: tuple = ()
+    ):
+        if l1_ttl:
+            await self._ensure_listener()
+            found, value = self.local.get(key)
+            if found:
+                return value
+
+        entry = await self.read(key)
+        if entry is not None:
+            if not self.should_refresh(entry, beta):
+                self.hits += 1
+                self._keep_local(key, entry['value'], l1_ttl, tags, entry['expires_at'])
+                return entry['value']
+            self.early_refreshes += 1
+        else:
+            self.misses += 1
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._load(key, compute, entry, ttl, jitter)
+            if is_cacheable(result):
+                self._keep_local(key, result, l1_ttl, tags)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # nobody may be waiting on it; keep asyncio from logging the exception as unretrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, key: str, compute, entry: dict | None, ttl: float, jitter: float):
+        lock_key = CACHE_LOCK_PREFIX + key
+        token = uuid.uuid4().hex
+        if not await self._client.set(lock_key, token, nx=True, px=int(self.lock_lease * 1000)):
+            if entry is not None:
+                # another process is refreshing it early, the current value is still valid
+                return entry['value']
+            self.lock_waits += 1
+            waited = await self._wait_for_value(key, lock_key)
+            if waited is not None:
+                return waited['value']
+            # the holder died or is too slow; compute without the lock rather than fail
+            return await self._compute_and_store(key, compute, ttl, jitter)
+        try:
+            return await self._compute_and_store(key, compute, ttl, jitter)
+        finally:
+            await self._release_lock(keys=[lock_key], args=[token])
+
+    async def _wait_for_value(self, key: str, lock_key: str) -> dict | None:
+        deadline = time.monotonic() + self.lock_lease
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            entry = await self.read(key)
+            if entry is not None:
+                return entry
+            if not await self._client.exists(lock_key):
+                return await self.read(key)
+        return None
+
+    async def _compute_and_store(self, key: str, compute, ttl: float, jitter: float):
+        started = time.monotonic()
+        result = await compute()
+        if is_cacheable(result):
+            await self.write(key, result, time.monotonic() - started, ttl, jitter)
         else:
-            laptop_logger.info(f'Result type {type(result)} not cached')
-        
+            laptop_logger.debug(f'Result type {type(result)} not cached')
         return result
-    
-    return wrapper
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses + self.early_refreshes
+        return {
+            'l1': self.local.metrics(),
+            'l2': {
+                'hits': self.hits,
+                'misses': self.misses,
+                'early_refreshes': self.early_refreshes,
+                'coalesced': self.coalesced,
+                'lock_waits': self.lock_waits,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            },
+        }
+
+
+single_flight_cache = SingleFlightCache(redis_client)
+
+
+def cache_result(
+    func=None,
+    *,
+    ttl: float = DEFAULT_CACHE_TTL,
+    jitter: float = DEFAULT_CACHE_JITTER,
+    beta: float = DEFAULT_XFETCH_BETA,
+    l1_ttl: float | None = None,
+    tags: tuple = (),
+    namespace: str | None = None,
+    version: int = 1
+):
+    '''
+    Caches the endpoint result in Redis for ttl seconds (+/- jitter as a fraction).
+    beta tunes XFetch: above 1 refreshes earlier, 0 disables early refresh.
+    l1_ttl additionally keeps hot results in process memory for that long; tags
+    name the data the result depends on, for invalidation on change.
+    Keys are namespaced by the function's module and qualified name unless a
+    namespace is given; bump version when the cached shape changes.
+    Usable bare (`@cache_result`) or configured (`@cache_result(ttl=300)`).
+    '''
+    def decorator(func):
+        signature = inspect.signature(func)
+        key_namespace = namespace or f'{func.__module__}.{func.__qualname__}'
+        key_tags = tuple(tags)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            generations = await single_flight_cache.generations(key_tags)
+            key = build_cache_key(key_namespace, bound.arguments, version, generations)
+            laptop_logger.debug(f'Generated cache key: {key}')
+            return await single_flight_cache.get_or_compute(
+                key, lambda: func(*args, **kwargs), ttl, jitter, beta, l1_ttl, key_tags
+            )
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
 
 
 
 async def send_message_to_redis(producer: AIOKafkaProducer, message: str | dict, producer_name: str):
     topic_key = 'add_info_to_redis'
     try:
-        async with producer:
-             await producer.send_message(topic_key, message)
-             laptop_logger.info(f'{producer_name} sent message to add info to Redis')
+        await producer.send_message(topic_key, message)
+        laptop_logger.info(f'{producer_name} sent message to add info to Redis')
              
     except KafkaError as e:
         laptop_logger.error(f'Error sending message to Kafka: {e}')
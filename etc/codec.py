@@ -0,0 +1,128 @@
+from functools import lru_cache
+from typing import Any, Type
+
+import msgpack
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_jsonable_python
+
+from config.logging_config import laptop_logger
+
+
+class CodecError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_: Any) -> TypeAdapter:
+    # building an adapter compiles a validator, do it once per type
+    return TypeAdapter(type_)
+
+
+def _default(value):
+    # pydantic models nested in plain containers, datetimes, UUIDs, enums...
+    return to_jsonable_python(value)
+
+
+class Codec:
+    '''
+    Payload format shared by producers, consumers and cache readers. Every
+    encoded payload starts with the codec's header byte, so readers pick the
+    decoder from the data itself and codecs can be switched without a
+    coordinated deploy.
+    '''
+    header: bytes
+    name: str
+
+    def encode(self, value: Any) -> bytes:
+        return self.header + self._encode_body(value)
+
+    def _encode_body(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode_body(self, body: bytes, type_: Any = None) -> Any:
+        raise NotImplementedError
+
+
+class OrjsonCodec(Codec):
+    header = b'\x01'
+    name = 'orjson'
+
+    def _encode_body(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            # straight from the model's compiled serializer, no intermediate dict
+            return value.__pydantic_serializer__.to_json(value)
+        return orjson.dumps(value, default=_default)
+
+    def decode_body(self, body: bytes, type_: Any = None) -> Any:
+        if type_ is not None:
+            # pydantic parses and validates the JSON in one pass
+            return type_adapter(type_).validate_json(body)
+        return orjson.loads(body)
+
+
+class JsonCodec(OrjsonCodec):
+    '''
+    Plain JSON without a header byte: the format written before codecs existed,
+    and the only one readers that predate this module can decode.
+    '''
+    header = b''
+    name = 'json'
+
+
+class MsgpackCodec(Codec):
+    header = b'\x02'
+    name = 'msgpack'
+
+    def _encode_body(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            value = value.model_dump(mode='json')
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+
+    def decode_body(self, body: bytes, type_: Any = None) -> Any:
+        value = msgpack.unpackb(body, raw=False)
+        if type_ is not None:
+            return type_adapter(type_).validate_python(value)
+        return value
+
+
+CODECS = {codec.header: codec for codec in (OrjsonCodec(), MsgpackCodec())}
+CODECS_BY_NAME = {codec.name: codec for codec in (JsonCodec(), *CODECS.values())}
+
+# Readers of every codec decode header-less JSON, but readers from before this
+# module decode nothing else. Writers stay on plain JSON until every consumer
+# and cache reader is upgraded; only then switch this to msgpack.
+default_codec = CODECS_BY_NAME['json']
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODECS_BY_NAME[name]
+    except KeyError:
+        raise CodecError(f'Unknown codec {name}, expected one of {", ".join(CODECS_BY_NAME)}')
+
+
+def encode(value: Any, codec: Codec | None = None) -> bytes:
+    return (codec or default_codec).encode(value)
+
+
+def decode(data: bytes | str | None, type_: Type | Any = None) -> Any:
+    '''
+    Decodes a payload written by any codec. Header-less data is taken as plain
+    JSON, the format everything was written in before codecs existed.
+    '''
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode()
+    if not data:
+        raise CodecError('Empty payload')
+    codec = CODECS.get(data[:1])
+    try:
+        if codec is None:
+            return CODECS_BY_NAME['orjson'].decode_body(data, type_)
+        return codec.decode_body(data[1:], type_)
+    except ValueError as e:
+        # JSON, msgpack and validation errors all derive from ValueError
+        laptop_logger.error(f'Error decoding {codec.name if codec else "legacy JSON"} payload: {e}')
+        raise CodecError(str(e)) from e
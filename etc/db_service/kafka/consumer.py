@@ -1,9 +1,7 @@
-# Standard Library Imports
-import json
-
 # Third-Party Imports
 from fastapi import HTTPException
-from aiokafka import AIOKafkaConsumer
+from aiokafka import AIOKafkaConsumer, TopicPartition
+from aiokafka.errors import KafkaError
 from passlib.context import CryptContext
 
 # Local Imports
@@ -14,10 +12,14 @@ from services.db_service.service.database_service import (
     update_user_sensitive_data,
     update_username,
     get_all_users,
+    search_users,
     check_data_coincidence,
     verify_user_credentials
 )
 from etc.cache import send_message_to_redis
+from backend.src.utils.cache_invalidation import USERS_CACHE_TAG, cache_invalidator
+from etc.dispatch import KeyedDispatcher, OffsetTracker
+from etc.codec import CodecError, decode
 from backend.src.utils.logger import laptop_logger
 from services.db_service.service.schemas import UserAddSchema
 from services.db_service.kafka.producer import db_kafka_producer
@@ -46,16 +48,35 @@ def hash_password(password: str) -> str:
 
 
 class KafkaConsumerClient:
-    def __init__(self, topics: dict, broker_url: str = SAppSettings.kafka_broker_url):
+    def __init__(self, topics: dict, broker_url: str = SAppSettings.kafka_broker_url, group_id: str = 'db-service', max_concurrency: int = 32, commit_interval_ms: int = 100):
         self.broker_url = broker_url
         self.topics = topics
+        self.group_id = group_id
         self.consumer = None
+        self.dispatcher = KeyedDispatcher(max_concurrency)
+        self.offsets = OffsetTracker()
+        self.commit_interval_ms = commit_interval_ms
+        self.handlers = {
+            'user-registration-topic': self.handle_user_registration,
+            'user-logging-in-topic': self.handle_user_login,
+            'user-get-profile-topic': self.handle_user_profile_request,
+            'delete-user-account-topic': self.handle_account_deletion,
+            'update-username-topic': self.handle_update_username,
+            'check-user-password-topic': self.handle_check_password,
+            'update-user-password-topic': self.handle_change_password,
+            'update-user-email-topic': self.handle_change_email,
+            'admin-get-all-users-topic': self.handle_admin_all_users_request,
+            'admin-search-users-topic': self.handle_admin_search_users,
+        }
 
     async def start(self, topics: list):
 
         self.consumer = AIOKafkaConsumer(
             *topics,
             bootstrap_servers=self.broker_url,
+            group_id=self.group_id,
+            # messages finish out of order, offsets are committed by commit_finished()
+            enable_auto_commit=False,
             value_deserializer=self.deserializer
         )
         await self.consumer.start()
@@ -66,126 +87,60 @@ class KafkaConsumerClient:
 
     def deserializer(self, serialized):
          if isinstance(serialized, dict):
-               laptop_logger.info(f"Received msg as dict: {serialized}")
                return serialized
-         elif isinstance(serialized, str):
-               laptop_logger.info(f"Received msg as string: {serialized}")
-               return json.loads(serialized)
-         elif isinstance(serialized, bytes):
-               decoded = serialized.decode('utf-8')
-               laptop_logger.info(f"Received msg as bytes: {decoded}")
-               return json.loads(decoded)
-         else:
-               laptop_logger.error(f"Unknown message type: {type(serialized)}")
+         try:
+               return decode(serialized)
+         except CodecError:
                return None
 
 
     async def event_handler(self, value, topic: str):
-        if topic == 'user-registration-topic':
-            laptop_logger.info(f"Handling user registration: {value}")
-            value = self.deserializer(value)
-            await self.handle_user_registration(value)
-        elif topic == 'user-logging-in-topic':
-            laptop_logger.info(f"User login attempt: {value}")
-            value = self.deserializer(value)
-            await self.handle_user_login(value)
-        elif topic == 'user-get-profile-topic':
-            laptop_logger.info(f'Handling user profile request: {value}')
-            value = self.deserializer(value)
-            await self.handle_user_profile_request(value)
-        elif topic == 'delete-user-account-topic':
-            laptop_logger.info(f'User account deletion attempt: {value}')
-            value = self.deserializer(value)
-            await self.handle_account_deletion(value)
-        elif topic == 'update-username-topic':
-            laptop_logger.info(f'An attempt to change username, info: {value}')
-            value = self.deserializer(value)
-            await self.handle_update_username(value)
-        elif topic == 'check-user-password-topic':
-            laptop_logger.info(f'Handling check-password request: {value}')
-            value = self.deserializer(value)
-            await self.handle_check_password(value)
-        elif topic == 'update-user-password-topic':
-            laptop_logger.info('Handling change-password request')
-            value = self.deserializer(value)
-            await self.handle_change_password(value)
-        elif topic == 'update-user-email-topic':
-            laptop_logger.info('Handling change-email request')
-            value = self.deserializer(value)
-            await self.handle_change_email(value)
-        elif topic == 'admin-get-all-users-topic':
-            laptop_logger.info(f"Admin attempt to get all users: {value}")
-            value = self.deserializer(value)
-            await self.handle_admin_all_users_request(value)
-        elif topic == 'admin-search-users-topic':
-             laptop_logger.info(f"Admin search users: {value}")
-             value = self.deserializer(value)
-             await self.handle_admin_search_users(value)
-        else:
+        handler = self.handlers.get(topic)
+        if handler is None:
             laptop_logger.warning(f"Received messager from unknown topic: {topic}")
-            
+            return
+        laptop_logger.debug(f"Handling message from {topic}: {value}")
+        await handler(value)
+
+    @staticmethod
+    def partition_key(msg):
+        '''Messages about the same user are handled in order; the rest run in parallel'''
+        value = msg.value
+        user_id = value.get('user_id') if isinstance(value, dict) else None
+        return user_id if user_id is not None else msg.key
+
     async def handle_admin_search_users(self, value):
+         request_id = value.get('request_id')
+         search_type = value.get('search_type')
+         search_query = value.get('search_query')
+         mode = value.get('mode', 'exact')
+         limit = value.get('limit')
+         offset = value.get('offset')
+         after_id = value.get('after_id')
+
+         laptop_logger.debug(f'Handling admin search-users in method: {request_id} {search_query} {search_type} {mode} {limit} {after_id or offset}')
          try:
-              request_id = value.get('request_id')
-              search_type = value.get('search_type')
-              
-              match search_type:
-                   case 'name':
-                        lc_param = 'name'
-                   case 'email':
-                        lc_param = 'email'
-                   case 'id':
-                        lc_param = 'id'
-                        
-              search_query = value.get('search_query')
-              limit = value.get('limit')
-              offset = value.get('offset')
-              
-              laptop_logger.debug(f'Handling admin search-users in method: {request_id} {search_query} {search_type} {limit} {offset}')
-              
-              users = await get_all_users(limit, offset)
-              
-              users_data = [
-                   {
-                		'id': user.id,
-                		'name': user.name,
-                		'email': user.email,
-                          }
-                  	for user in users
-                              ]
-              
-              if not users_data:
-                   response_data = {
-                		'request_id': request_id,
-                		'data': 'valid',
-                		'users': 'No users found',
-            				}
-                   
-                   await send_message_to_redis(db_kafka_producer, response_data, 'Database producer')
-                   
-              filtered_users = [user for user in users_data if user.get(lc_param) == search_query]
-              if filtered_users:
-                        response_data = {
-                    			'request_id': request_id,
-                    			'data': 'valid',
-                    			'users': filtered_users,
-                  		}
-                        
-              else:
-                        response_data = {
-                    			'request_id': request_id,
-                    			'data': 'valid',
-                    			'users': 'No users matching the search query',
-                			}
-                        
-              await send_message_to_redis(db_kafka_producer, response_data, 'Database producer')
-                             
+              users_data = await search_users(search_type, search_query, mode, limit=limit, after_id=after_id, offset=offset)
+         except ValueError as e:
+              laptop_logger.warning(f'Invalid admin search-users request {request_id}: {e}')
+              users_data = []
          except Exception as e:
-              laptop_logger.error(f'Error when fetching all users to filter, limit: {limit}, offset: {offset}: {e}')
-              raise HTTPException(status_code=500, detail='Error when fetching all users for filtering')
+              laptop_logger.error(f'Error when searching users by {search_type}, limit: {limit}, offset: {offset}: {e}')
+              # answered explicitly, so the admin request fails fast instead of timing out
+              await send_message_to_redis(db_kafka_producer, {
+                   'request_id': request_id,
+                   'data': 'invalid',
+                   'error': 'Error when searching users',
+              }, 'Database producer')
+              return
+
+         response_data = {
+              'request_id': request_id,
+              'data': 'valid',
+              'users': users_data or 'No users matching the search query',
+         }
+         await send_message_to_redis(db_kafka_producer, response_data, 'Database producer')
 
-             
-            
     async def handle_admin_all_users_request(self, value):
         request_id = value.get('request_id')
         limit = value.get('limit')
@@ -257,6 +212,7 @@ class KafkaConsumerClient:
                  res = await update_user_sensitive_data(new_email=new_email, user_id=user_id)
                       
                  if res.get('status') == 'success':
+                    await cache_invalidator.invalidate(USERS_CACHE_TAG)
                     response_data = {
                         'request_id': request_id,
                         'data': 'valid',
@@ -311,6 +267,7 @@ class KafkaConsumerClient:
             try:
                     result = await update_username(user_id, new_name)
                     if result.get('status') == 'success':
+                            await cache_invalidator.invalidate(USERS_CACHE_TAG)
                             response_data = {
                             'request_id': request_id,
                             'data': 'valid',
@@ -340,6 +297,7 @@ class KafkaConsumerClient:
         try:
                 result = await delete_user(user_id)
                 if result.get('status') == 'success':
+                        await cache_invalidator.invalidate(USERS_CACHE_TAG)
                         response_data = {
                             'request_id': request_id,
                             'data': 'valid',
@@ -411,6 +369,7 @@ class KafkaConsumerClient:
         try:
              res = await add_user(user_data)
              if res.get('status') == 'success':
+                 await cache_invalidator.invalidate(USERS_CACHE_TAG)
                  response_data = {
 						  'request_id': request_id,
 						  'data': 'valid',
@@ -461,15 +420,46 @@ class KafkaConsumerClient:
                 laptop_logger.error(f"Error when trying to log in user: {e}")
                 raise HTTPException(status_code=404, detail=f"Error when logging in user")
 
+    async def submit(self, msg):
+        partition = TopicPartition(msg.topic, msg.partition)
+        self.offsets.started(partition, msg.offset)
+
+        async def job():
+            try:
+                # value_deserializer already decoded the payload, handlers get the dict as is
+                await self.event_handler(msg.value, msg.topic)
+            finally:
+                self.offsets.finished(partition, msg.offset)
+
+        await self.dispatcher.submit(self.partition_key(msg), job)
+
+    async def commit_finished(self):
+        '''Commits, per assigned partition, up to the lowest message not handled yet'''
+        assigned = self.consumer.assignment()
+        offsets = {tp: offset for tp, offset in self.offsets.committable().items() if tp in assigned}
+        if not offsets:
+            return
+        try:
+            await self.consumer.commit(offsets)
+            self.offsets.committed(offsets)
+        except KafkaError as e:
+            # e.g. a rebalance took the partitions away; their messages are redelivered
+            laptop_logger.warning(f'DB consumer failed to commit offsets: {e}')
+
     async def consume_messages(self):
         laptop_logger.info('DB consumer is consuming msgs')
         await self.start(list(self.topics.values()))
 
         try:
-            async for msg in self.consumer:
-                topic_key = msg.topic
-                await self.event_handler(msg.value, topic_key)
+            while True:
+                batches = await self.consumer.getmany(timeout_ms=self.commit_interval_ms)
+                for records in batches.values():
+                    for msg in records:
+                        await self.submit(msg)
+                await self.commit_finished()
         finally:
+            await self.dispatcher.join()
+            await self.commit_finished()
             await self.stop()
 
 
@@ -477,5 +467,10 @@ db_kafka_consumer = KafkaConsumerClient(LOCAL_TOPICS)
 
 async def run_db_consumer():
     laptop_logger.info('Database consumer started')
-    await db_kafka_consumer.consume_messages()
+    try:
+        await db_kafka_consumer.consume_messages()
+    finally:
+        await db_kafka_producer.stop()
+        # no HTTP app to expose them on, the totals go to the log
+        laptop_logger.info(f'Database producer metrics: {db_kafka_producer.metrics()}')
     laptop_logger.info('Stopping DB kafka consumer')
\ No newline at end of file
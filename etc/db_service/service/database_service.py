@@ -7,7 +7,7 @@ from typing import AsyncGenerator, Dict, List
 from fastapi import Depends, FastAPI, status
 
 # SQLAlchemy
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from pydantic import EmailStr
@@ -16,6 +16,7 @@ from .schemas import UserAddSchema, LaptopSchema
 
 # Logger
 from backend.src.utils.logger import laptop_logger
+from backend.src.utils.search import SearchMode, search_clause
 
 # Exceptions
 from .exc import DatabaseException, create_exception_handler
@@ -50,6 +51,8 @@ async def lifespan(app: FastAPI):
         '''
 
         async with engine.begin() as conn:
+             # the users search indexes are trigram GIN indexes
+             await conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
              await conn.run_sync(Base.metadata.drop_all)
              await conn.run_sync(Base.metadata.create_all)
 
@@ -226,6 +229,45 @@ async def get_all_users(session: AsyncSession, limit: int = 100, offset: int = 0
         laptop_logger.error(f"Error retrieving users from DB: {e}")
         return None
 
+
+USER_SEARCH_FIELDS = ('id', 'name', 'email')
+
+
+@with_session
+async def search_users(
+          field: str,
+          query: str | int,
+          mode: SearchMode | str = SearchMode.EXACT,
+          limit: int = 100,
+          after_id: int | None = None,
+          offset: int = 0,
+          session: AsyncSession = None) -> List[dict]:
+    '''
+    Filters users in SQL, ordered by id. Pages by keyset when after_id is given,
+    falls back to offset for callers that still send one.
+    '''
+    if field not in USER_SEARCH_FIELDS:
+        raise ValueError(f'Users can not be searched by {field}')
+    try:
+        statement = (
+            select(UserModel.id, UserModel.name, UserModel.email)
+            .where(search_clause(getattr(UserModel, field), query, mode))
+        )
+        if after_id is not None:
+            statement = statement.where(UserModel.id > after_id)
+        elif offset:
+            statement = statement.offset(offset)
+        result = await session.execute(statement.order_by(UserModel.id).limit(limit))
+        users = [dict(row) for row in result.mappings()]
+
+        laptop_logger.debug(f"Found {len(users)} users by {field} ({mode})")
+        return users
+
+    except SQLAlchemyError as e:
+        # raised, not swallowed: the caller must not answer an outage with "no matches"
+        laptop_logger.error(f"Error searching users in DB: {e}")
+        raise
+
     
 @with_session
 async def check_data_coincidence(user_id: int, new_data: str, data_type: str, session: AsyncSession):
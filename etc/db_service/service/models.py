@@ -1,5 +1,5 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.sql.schema import ForeignKey
 
 
@@ -9,6 +9,11 @@ class Base(DeclarativeBase):
 
 class UserModel(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_name', 'name'),
+        Index('ix_users_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('ix_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
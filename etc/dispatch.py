@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from config.logging_config import logger
+
+
+class KeyedDispatcher:
+    '''
+    Runs consumed messages concurrently while keeping per-key order: a message
+    waits for the previous one with the same key, messages with different keys
+    run in parallel. At most `max_concurrency` messages are in flight; submit()
+    blocks past that, which in turn stops the consumer loop from fetching more.
+    A key of None means "no ordering constraint".
+    '''
+
+    def __init__(self, max_concurrency: int = 32):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tails: Dict[Hashable, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.processed = 0
+        self.failed = 0
+
+    async def submit(self, key: Optional[Hashable], job: Callable[[], Awaitable[Any]]) -> None:
+        await self._slots.acquire()
+        previous = self._tails.get(key) if key is not None else None
+        task = asyncio.create_task(self._run(key, previous, job))
+        if key is not None:
+            self._tails[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, previous: Optional[asyncio.Task], job) -> None:
+        try:
+            if previous is not None:
+                # the predecessor's outcome doesn't matter, only that it finished
+                await asyncio.wait((previous,))
+            await job()
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f'Dispatcher: message with key {key} failed: {e}')
+        finally:
+            self._slots.release()
+            if key is not None and self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def join(self) -> None:
+        '''Waits until every submitted message has been handled'''
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+
+class OffsetTracker:
+    '''
+    Commit positions for messages that finish out of order. Everything below the
+    lowest offset still being handled in a partition is done, so that offset is
+    safe to commit; with nothing pending it is the last started offset + 1.
+    A crash then redelivers only messages that may not have been handled.
+    '''
+
+    def __init__(self):
+        self._pending: Dict[Hashable, Set[int]] = {}
+        self._next: Dict[Hashable, int] = {}
+        self._committed: Dict[Hashable, int] = {}
+
+    def started(self, partition: Hashable, offset: int) -> None:
+        self._pending.setdefault(partition, set()).add(offset)
+        self._next[partition] = offset + 1
+
+    def finished(self, partition: Hashable, offset: int) -> None:
+        self._pending[partition].discard(offset)
+
+    def committable(self) -> Dict[Hashable, int]:
+        '''Per partition, the offset to commit if it moved since the last commit'''
+        offsets = {}
+        for partition, next_offset in self._next.items():
+            pending = self._pending[partition]
+            offset = min(pending) if pending else next_offset
+            if self._committed.get(partition) != offset:
+                offsets[partition] = offset
+        return offsets
+
+    def committed(self, offsets: Dict[Hashable, int]) -> None:
+        self._committed.update(offsets)
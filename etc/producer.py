@@ -1,49 +1,131 @@
-import json
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from aiokafka import AIOKafkaProducer
+from aiokafka.codec import has_gzip, has_lz4, has_snappy, has_zstd
 from config.logging_config import logger
 from config.settings import SAppSettings
+from etc.codec import Codec, default_codec
+
+# only the codecs whose libraries are installed: snappy, lz4 and zstd need cramjam,
+# and AIOKafkaProducer would otherwise fail only when it is started
+COMPRESSION_TYPES = (None, *(
+    name for name, available in (('gzip', has_gzip), ('snappy', has_snappy), ('lz4', has_lz4), ('zstd', has_zstd))
+    if available()
+))
+
 
 class KafkaProducerClient:
-    def __init__(self, topics: dict, broker_url: str = SAppSettings.kafka_broker_url):
+    '''
+    Long-lived producer shared by every request of a service. It is started once
+    (by the app lifespan, or lazily by the first send) and stopped on shutdown;
+    AIOKafkaProducer batches concurrent sends, so one instance serves all requests.
+    '''
+
+    def __init__(
+        self,
+        topics: dict,
+        broker_url: str = SAppSettings.kafka_broker_url,
+        linger_ms: int = 5,
+        max_batch_size: int = 16384,
+        compression_type: str | None = 'gzip',
+        codec: Codec = default_codec
+    ):
+        if compression_type not in COMPRESSION_TYPES:
+            raise ValueError(
+                f"Producer: unsupported compression type {compression_type}, "
+                f"expected one of {', '.join(str(name) for name in COMPRESSION_TYPES)}"
+            )
         self.broker_url = broker_url
         self.topics = topics
+        self.linger_ms = linger_ms
+        self.max_batch_size = max_batch_size
+        self.compression_type = compression_type
+        self.codec = codec
         self.producer = None
-        
+        self._start_lock = asyncio.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
     async def start(self):
-        self.producer = AIOKafkaProducer(
-            bootstrap_servers=self.broker_url,
-            value_serializer=self.serializer,
-            compression_type='gzip'
-        )
-        await self.producer.start()
+        async with self._start_lock:
+            if self.producer:
+                return
+            producer = AIOKafkaProducer(
+                bootstrap_servers=self.broker_url,
+                value_serializer=self.serializer,
+                compression_type=self.compression_type,
+                linger_ms=self.linger_ms,
+                max_batch_size=self.max_batch_size
+            )
+            await producer.start()
+            self.producer = producer
+            logger.info('Producer: started')
 
     async def stop(self):
-        if self.producer:
-            await self.producer.stop()
+        async with self._start_lock:
+            if self.producer:
+                await self.producer.stop()
+                self.producer = None
+                logger.info('Producer: stopped')
 
     def serializer(self, value: dict | object) -> bytes:
-        if hasattr(value, 'model_dump'):
-            value = value.model_dump()
-        return json.dumps(value).encode()
+        return self.codec.encode(value)
+
+    def _record_delivery(self, started: float, future: asyncio.Future):
+        if future.cancelled() or future.exception():
+            self.failed += 1
+            logger.error(f"Producer: message delivery failed: {future.exception() if not future.cancelled() else 'cancelled'}")
+            return
+        latency = time.perf_counter() - started
+        self.sent += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
 
     async def send_message(self, topic_key: str, message: dict):
-        if not self.producer:
-               logger.error("Producer: producer is not started")
-               raise Exception("Producer: producer is not started or not initialized")
-        
         topic = self.topics.get(topic_key)
-        if topic:
-            await self.producer.send(topic, message)
-            logger.debug('Producer: message sent')
-        else:
+        if not topic:
             logger.error(f"Producer: topic with key: {topic_key} not found while sending message")
             raise Exception(f"Producer: topic with key: {topic_key} not found while sending message")
 
+        if not self.producer:
+            await self.start()
+
+        started = time.perf_counter()
+        # send() only enqueues into the current batch; delivery is tracked in the background
+        delivery = await self.producer.send(topic, message)
+        delivery.add_done_callback(lambda future: self._record_delivery(started, future))
+        logger.debug('Producer: message sent')
+
+    def metrics(self) -> dict:
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'send_latency_avg_ms': self.latency_total / self.sent * 1000 if self.sent else 0.0,
+            'send_latency_max_ms': self.latency_max * 1000,
+        }
+
     async def __aenter__(self):
-        logger.debug('Starting producer')
-        await self.start()
+        # kept for callers that scope a send block; the connection outlives the block
+        if not self.producer:
+            await self.start()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        logger.debug('Exiting producer')
-        await self.stop()
\ No newline at end of file
+        pass
+
+
+def producer_lifespan(*producers: KafkaProducerClient):
+    '''FastAPI lifespan that connects the service's producers on startup and flushes them on shutdown'''
+    @asynccontextmanager
+    async def lifespan(app):
+        for producer in producers:
+            await producer.start()
+        try:
+            yield
+        finally:
+            for producer in producers:
+                await producer.stop()
+    return lifespan
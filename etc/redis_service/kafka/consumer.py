@@ -1,15 +1,41 @@
-import json
 import redis.asyncio as redis
 from aiokafka import AIOKafkaConsumer
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
 from backend.src.utils.logger import laptop_logger
 from config.settings import SAppSettings
+from etc.cache import RESPONSE_CHANNEL, encode_response_frame
+from etc.codec import Codec, CodecError, decode, default_codec
+
+
+RESPONSE_TTL = 300
+BATCH_SIZE = 500
+BATCH_TIMEOUT_MS = 100
 
 
 class KafkaConsumerClient:
-    def __init__(self, broker_url: str = SAppSettings.kafka_broker_url, redis_url: str = SAppSettings.redis_url):
+    '''
+    Consumes responses in batches: every getmany() batch is written with one Redis
+    pipeline (SET with TTL + PUBLISH per response) and its offsets are committed
+    only after the pipeline succeeded, so a failed write is redelivered.
+    '''
+
+    def __init__(
+        self,
+        broker_url: str = SAppSettings.kafka_broker_url,
+        redis_url: str = SAppSettings.redis_url,
+        group_id: str = 'redis-service',
+        response_ttl: int = RESPONSE_TTL,
+        batch_size: int = BATCH_SIZE,
+        batch_timeout_ms: int = BATCH_TIMEOUT_MS,
+        codec: Codec = default_codec
+    ):
         self.broker_url = broker_url
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.redis_client = redis.from_url(redis_url)
+        self.codec = codec
+        self.group_id = group_id
+        self.response_ttl = response_ttl
+        self.batch_size = batch_size
+        self.batch_timeout_ms = batch_timeout_ms
         self.consumer = None
         self.topic = 'add-info-to-redis'
 
@@ -17,6 +43,8 @@ class KafkaConsumerClient:
         self.consumer = AIOKafkaConsumer(
             self.topic,
             bootstrap_servers=self.broker_url,
+            group_id=self.group_id,
+            enable_auto_commit=False,
             value_deserializer=self.deserializer
         )
         await self.consumer.start()
@@ -30,55 +58,79 @@ class KafkaConsumerClient:
     def deserializer(self, serialized: bytes) -> Dict[str, Any]:
         try:
             if isinstance(serialized, dict):
-                laptop_logger.info(f"Redis consumer received msg as dict: {serialized}")
                 return serialized
-            else:
-                laptop_logger.info(f"Redis consumer received msg as string: {serialized}")
-                return json.loads(serialized.decode('utf-8'))
-        except Exception as e:
+            return decode(serialized)
+        except CodecError as e:
             laptop_logger.error(f"Redis consumer thrown error deserializing message: {e}")
             return {}
-      
-    async def event_handler(self, value: Dict[str, Any]):
-        laptop_logger.info(f"Handling Redis data: {value}")
+
+    def build_response(self, value: Dict[str, Any]) -> Optional[Tuple[str, Any]]:
+        '''Picks the request_id and the payload to store out of a service response'''
         key = value.get("request_id")
-        status = value.get("data")
-        laptop_logger.info(f'Redis service recieved {key} and response status is {status}')
-        if key:
-               if value.get('special'):
-                       special = value.get('special')
-                       laptop_logger.info(f'Handling special adding to redis: {special}, {status}')
-                       await self.redis_client.set(key, json.dumps(status))
-                       laptop_logger.info(f"SPECIAL: Stored in Redis: {key} -> {status}")
-                       
-               elif value.get('user'):
-                      user_data = value.get('user')
-                      laptop_logger.info(f'Handling user-data adding to redis: {user_data}, {status}')
-                      await self.redis_client.set(key, json.dumps(user_data))
-                      laptop_logger.info(f"Stored in Redis: {key} -> {user_data}")
-                      
-               elif value.get('users'):
-                                    users_data = value.get('users')
-                                    laptop_logger.info(f'Handling users-data adding to redis: {users_data}, {status}')
-                                    await self.redis_client.set(key, json.dumps(users_data))
-                                    laptop_logger.info(f"Stored in Redis: {key} -> {users_data}")
-                       
-               else:
-                     laptop_logger.warning(f"Received incomplete data for Redis: {value}")
+        if not key:
+            laptop_logger.warning(f"Received data without request_id for Redis: {value}")
+            return None
+        if value.get('error'):
+            # a failed request, answered so the waiting caller does not time out
+            return key, {'error': value['error']}
+        if value.get('special'):
+            return key, value.get("data")
+        if value.get('user'):
+            return key, value.get('user')
+        if value.get('users'):
+            return key, value.get('users')
+        laptop_logger.warning(f"Received incomplete data for Redis: {value}")
+        return None
 
+    def queue_response(self, pipe, key: str, data: Any):
+        # encoded once: the value is stored for late readers, and the same bytes
+        # are published to wake the waiting request
+        payload = self.codec.encode(data)
+        pipe.set(key, payload, ex=self.response_ttl)
+        pipe.publish(RESPONSE_CHANNEL, encode_response_frame(key, payload))
+
+    async def store_responses(self, responses: List[Tuple[str, Any]]):
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key, data in responses:
+                self.queue_response(pipe, key, data)
+            await pipe.execute()
+
+    async def event_handler(self, value: Dict[str, Any]):
+        response = self.build_response(value)
+        if response:
+            await self.store_responses([response])
+            laptop_logger.debug(f"Stored in Redis: {response[0]}")
+
+    async def consume_batch(self) -> int:
+        batches = await self.consumer.getmany(timeout_ms=self.batch_timeout_ms, max_records=self.batch_size)
+        responses = []
+        count = 0
+        for records in batches.values():
+            count += len(records)
+            for record in records:
+                if record.value:
+                    response = self.build_response(record.value)
+                    if response:
+                        responses.append(response)
+        if responses:
+            await self.store_responses(responses)
+        if count:
+            # getmany() advanced the positions past this batch, commit them now that Redis has it
+            await self.consumer.commit()
+            laptop_logger.debug(f"Redis consumer stored {len(responses)} responses from {count} messages")
+        return count
 
     async def consume_messages(self):
         laptop_logger.info('Redis consumer is running')
         await self.start()
         try:
-            async for msg in self.consumer:
-                data = self.deserializer(msg.value)
-                if data:
-                    await self.event_handler(data)
+            while True:
+                await self.consume_batch()
         finally:
             await self.stop()
 
 
+redis_kafka_consumer = KafkaConsumerClient()
+
 async def run_redis_consumer():
-    redis_consumer = KafkaConsumerClient()
-    await redis_consumer.consume_messages()
+    await redis_kafka_consumer.consume_messages()
@@ -1,18 +1,176 @@
-from services.db_service.kafka.consumer import run_db_consumer
-from services.auth_service.kafka.consumer import run_auth_consumer
-from services.redis_service.kafka.consumer import run_redis_consumer
+from services.db_service.kafka.consumer import run_db_consumer, db_kafka_consumer
+from services.auth_service.kafka.consumer import run_auth_consumer, auth_kafka_consumer
+from services.redis_service.kafka.consumer import run_redis_consumer, redis_kafka_consumer
+import argparse
 import asyncio
+import multiprocessing
+import signal
+import time
 
 # Logger
 from config.logging_config import laptop_logger
 
-funcs = [run_db_consumer, run_auth_consumer, run_redis_consumer]
+# name -> (entrypoint, client whose AIOKafkaConsumer is inspected for lag)
+CONSUMERS = {
+    'db': (run_db_consumer, db_kafka_consumer),
+    'auth': (run_auth_consumer, auth_kafka_consumer),
+    'redis': (run_redis_consumer, redis_kafka_consumer),
+}
+
+INITIAL_BACKOFF = 1
+MAX_BACKOFF = 60
+# a consumer that stayed up this long is considered healthy again, its backoff resets
+STABLE_AFTER = 60
+LAG_REPORT_INTERVAL = 30
+
+
+async def wait_or_stop(stop: asyncio.Event, timeout: float) -> bool:
+    '''Sleeps for timeout seconds, returns True early if shutdown was requested'''
+    try:
+        await asyncio.wait_for(stop.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+async def supervise(name: str, run, stop: asyncio.Event):
+    backoff = INITIAL_BACKOFF
+    while not stop.is_set():
+        started = time.monotonic()
+        laptop_logger.info(f'Starting consumer {name}')
+        try:
+            await run()
+            laptop_logger.warning(f'Consumer {name} exited')
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            laptop_logger.error(f'Consumer {name} crashed: {e}')
+
+        if time.monotonic() - started >= STABLE_AFTER:
+            backoff = INITIAL_BACKOFF
+        laptop_logger.info(f'Restarting consumer {name} in {backoff}s')
+        if await wait_or_stop(stop, backoff):
+            return
+        backoff = min(backoff * 2, MAX_BACKOFF)
+
+
+async def consumer_lag(client) -> dict:
+    '''Messages behind the partition high watermark, per assigned partition'''
+    consumer = client.consumer
+    if consumer is None:
+        return {}
+    lag = {}
+    for tp in consumer.assignment():
+        highwater = consumer.highwater(tp)
+        if highwater is None:
+            continue
+        position = await consumer.position(tp)
+        lag[f'{tp.topic}[{tp.partition}]'] = max(highwater - position, 0)
+    return lag
+
+
+async def report_lag(names: list, stop: asyncio.Event, interval: float = LAG_REPORT_INTERVAL):
+    while not await wait_or_stop(stop, interval):
+        for name in names:
+            try:
+                lag = await consumer_lag(CONSUMERS[name][1])
+            except Exception as e:
+                laptop_logger.warning(f'Could not read lag of consumer {name}: {e}')
+                continue
+            laptop_logger.info(f'Consumer {name} lag: total={sum(lag.values())} {lag}')
+
+
+async def run_all_consumers(names: tuple = tuple(CONSUMERS)):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    tasks = [asyncio.create_task(supervise(name, CONSUMERS[name][0], stop), name=name) for name in names]
+    reporter = asyncio.create_task(report_lag(names, stop))
+
+    await stop.wait()
+    laptop_logger.info('Shutting down consumers')
+    # cancellation unwinds each consume loop through its finally: in-flight
+    # messages are drained, the consumer and its producer are stopped
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, reporter, return_exceptions=True)
+    laptop_logger.info('All consumers stopped')
+
+
+def worker(names: list):
+    asyncio.run(run_all_consumers(names))
+
+
+def run_processes(processes: int, names: list):
+    '''
+    Runs `processes` copies of the consumers, each in its own interpreter. The
+    consumers share a group_id per service, so Kafka spreads partitions across
+    the copies. Dead workers are restarted with backoff, SIGTERM is forwarded.
+    '''
+    context = multiprocessing.get_context('spawn')
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    def spawn(slot: int):
+        process = context.Process(target=worker, args=(names,), name=f'consumers-{slot}')
+        process.start()
+        return process
+
+    workers = [spawn(slot) for slot in range(processes)]
+    backoffs = [INITIAL_BACKOFF] * processes
+    restart_at = [None] * processes
+    started_at = [time.monotonic()] * processes
+
+    while not stopping:
+        now = time.monotonic()
+        for slot, process in enumerate(workers):
+            if process.is_alive():
+                continue
+            if restart_at[slot] is None:
+                if now - started_at[slot] >= STABLE_AFTER:
+                    backoffs[slot] = INITIAL_BACKOFF
+                laptop_logger.error(f'{process.name} exited with code {process.exitcode}, restarting in {backoffs[slot]}s')
+                restart_at[slot] = now + backoffs[slot]
+                backoffs[slot] = min(backoffs[slot] * 2, MAX_BACKOFF)
+            elif now >= restart_at[slot]:
+                workers[slot] = spawn(slot)
+                started_at[slot] = now
+                restart_at[slot] = None
+        time.sleep(0.5)
+
+    laptop_logger.info('Stopping consumer processes')
+    for process in workers:
+        if process.is_alive():
+            process.terminate()
+    for process in workers:
+        process.join()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the Kafka consumers under a supervisor')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='worker processes running the consumers (0 runs them as tasks in this process)')
+    parser.add_argument('--consumers', default=','.join(CONSUMERS),
+                        help=f'comma-separated subset of {", ".join(CONSUMERS)}')
+    args = parser.parse_args()
+    names = [name.strip() for name in args.consumers.split(',') if name.strip()]
+    unknown = set(names) - set(CONSUMERS)
+    if unknown:
+        parser.error(f'unknown consumers: {", ".join(sorted(unknown))}')
+    return args.processes, names
 
-async def run_all_consumers():
-    for func in funcs:
-        await func()
-        laptop_logger.info(f'Starting consumer {func.__name__.removeprefix('run_')
-}')
 
 if __name__ == '__main__':
-    asyncio.run(run_all_consumers())
\ No newline at end of file
+    processes, names = parse_args()
+    if processes > 0:
+        run_processes(processes, names)
+    else:
+        asyncio.run(run_all_consumers(names))
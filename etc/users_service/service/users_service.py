@@ -1,8 +1,9 @@
 from functools import wraps
 from fastapi import FastAPI, Request, Response, Security, HTTPException
 from pydantic import EmailStr
-from services.auth_service.service.depends import auth_required
+from services.auth_service.service.depends import admin_required, auth_required
 from services.users_service.kafka.producer import users_kafka_producer
+from etc.producer import producer_lifespan
 from backend.src.utils.logger import laptop_logger
 from etc.cache import wait_for_response
 import json
@@ -13,7 +14,7 @@ UserNameUpdateSchema
 )
 import uuid
 
-users_service_holder = FastAPI(title='Users Service')
+users_service_holder = FastAPI(lifespan=producer_lifespan(users_kafka_producer), title='Users Service')
 
 async def get_user_id(request: Request):
 
@@ -24,9 +25,8 @@ async def get_user_id(request: Request):
     message = {'http_request_cookies': cookies, 'request_id': request_id}
 
     try:
-        async with users_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.debug(f"User id get request sent to Kafka with request_id: {request_id}")
+        await users_kafka_producer.send_message(topic_key, message)
+        laptop_logger.debug(f"User id get request sent to Kafka with request_id: {request_id}")
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in auth: {response_data}")
@@ -66,9 +66,8 @@ async def get_profile(request: Request) -> dict:
     message = {'user_id': user_id, 'request_id': request_id}
 
     try:
-        async with users_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.info(f"Profile get request sent to Kafka with request_id: {request_id}")
+        await users_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info(f"Profile get request sent to Kafka with request_id: {request_id}")
 
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in auth: {response_data}")
@@ -107,9 +106,8 @@ async def delete_account(request: Request, response: Response) -> dict:
     
     message = {'request_id': request_id, 'user_id': user_id}
     try:
-        async with users_kafka_producer as producer:
-            await producer.send_message(topic_key, message)
-            laptop_logger.info(f'Sent message with id {request_id} for user {user_id} account deletion')
+        await users_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info(f'Sent message with id {request_id} for user {user_id} account deletion')
             
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in users: {response_data}")
@@ -154,9 +152,8 @@ async def update_username(data: UserNameUpdateSchema, request: Request):
     topic_key = 'update_username'
     message = {'request_id': request_id, 'user_id': user_id, 'new_name': new_name}
     try:
-        async with users_kafka_producer as producer:
-             await producer.send_message(topic_key, message)
-             laptop_logger.info('Sent username-update request')
+        await users_kafka_producer.send_message(topic_key, message)
+        laptop_logger.info('Sent username-update request')
              
         response_data = await wait_for_response(request_id)
         laptop_logger.info(f"Response from cache in users: {response_data}")
@@ -189,8 +186,7 @@ async def change_sensitive_info(
     
     topic_key = 'check_user_password'
     
-    async with users_kafka_producer as producer:
-        await producer.send_message(topic_key, message)
+    await users_kafka_producer.send_message(topic_key, message)
         
     response_data = await wait_for_response(request_id)
     laptop_logger.info(f"Response from cache in users ch-password: {response_data}")
@@ -213,9 +209,8 @@ async def change_sensitive_info(
             
             laptop_logger.debug('Configured message for password change')
                  
-            async with users_kafka_producer as producer:
-                 await producer.send_message(topic_key, message)
-                 laptop_logger.info('Sent message for changing password')
+            await users_kafka_producer.send_message(topic_key, message)
+            laptop_logger.info('Sent message for changing password')
                  
             response_data = await wait_for_response(request_id)
             laptop_logger.info(f"Response from cache in users change-password: {response_data}")
@@ -247,8 +242,7 @@ async def change_sensitive_info(
     
     topic_key = 'check_user_password'
     
-    async with users_kafka_producer as producer:
-        await producer.send_message(topic_key, message)
+    await users_kafka_producer.send_message(topic_key, message)
         
     response_data = await wait_for_response(request_id)
     laptop_logger.info(f"Response from cache in users ch-password: {response_data}")
@@ -271,9 +265,8 @@ async def change_sensitive_info(
                  message = {'request_id': request_id, 'user_id': user_id, 'new_email': data.new_email}
                  laptop_logger.info('Configured message for email change')
                  
-            async with users_kafka_producer as producer:
-                 await producer.send_message(topic_key, message)
-                 laptop_logger.info('Sent message for changing email')
+            await users_kafka_producer.send_message(topic_key, message)
+            laptop_logger.info('Sent message for changing email')
                  
             response_data = await wait_for_response(request_id)
             laptop_logger.info(f"Response from cache in users change-email: {response_data}")
@@ -285,4 +278,9 @@ async def change_sensitive_info(
             
             if res_1 == 'valid':
                 laptop_logger.info('Successfull sensitive data change')
-                return {'status': 'success'}
\ No newline at end of file
+                return {'status': 'success'}
+
+
+@users_service_holder.get('/metrics/kafka-producer', tags=['Metrics'], dependencies=[Security(admin_required)])
+async def kafka_producer_metrics():
+    return users_kafka_producer.metrics()
@@ -1,18 +1,25 @@
 from typing import Any, Awaitable, Callable, Dict, Optional
 from fastapi import FastAPI, HTTPException, Request, Response, status
-from fastapi.responses import JSONResponse
 from jwt import ExpiredSignatureError, InvalidTokenError
 from pydantic import BaseModel
 from config.settings import Settings
 from src.infrastructure.s3.s3_client_factory import s3_client_maker
 from src.application.repositories.S3Repository import S3Repository
-from src.presentation.api.auth_service.utils import create_access_token, decode_jwt
+from src.presentation.api.auth_service.utils import create_access_token, decode_jwt, password_hasher
+from src.presentation.api.auth_service.token_cache import token_cache
 #from src.presentation.api.routers import apply_routers
+import time
+import uuid
 import uvicorn
 from src.core.entities.entities import TokenPayload
-from src.utils.logger import logger
-from starlette.middleware.base import BaseHTTPMiddleware
+from src.utils.logger import install_queue_logging, logger, logging_metrics, shutdown_logging
+from src.utils.log_context import bind_log_context, reset_log_context
+from src.presentation.policies import Policy, auth_policy, compile_app_policies
+from src.presentation.responses import FastJSONResponse, FastJSONRoute
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from src.presentation.dependencies import UoWDep, ElasticDep, get_uow
+from src.infrastructure.db.db import get_pool_metrics
 from contextlib import asynccontextmanager
 from redis.asyncio import Redis
 from config.settings import Settings
@@ -23,15 +30,20 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DataError, Operation
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+	# shutdown_logging() at the end of a previous lifespan put the handlers back in place
+	install_queue_logging('logger', 'test_logger')
 	app.state.redis = Redis(host=Settings.redis_host, port=Settings.redis_port, db=0)
 	s3_client = await s3_client_maker()
 	app.state.s3_repository = S3Repository(s3_client)
 	yield
 	await app.state.redis.close()
 	await s3_client.close()
+	password_hasher.shutdown()
+	shutdown_logging()
 
 
-app = FastAPI(title='Laptop API', lifespan=lifespan)
+app = FastAPI(title='Laptop API', lifespan=lifespan, default_response_class=FastJSONResponse)
+app.router.route_class = FastJSONRoute
 #apply_routers(app)
 
 from botocore.exceptions import ClientError
@@ -51,7 +63,7 @@ from botocore.exceptions import ClientError
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
@@ -71,7 +83,7 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
         status_code = 400
         detail = "Invalid data format"
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
         content={"detail": detail}
     )
@@ -124,163 +136,255 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
 # ------------ App ------------
 
 
-PUBLIC_PATHS = {"/", "/docs", "/openapi.json", "/redoc", '/documents/data', "/search/data", "/rmq_send", "/rmq_consume"}
-ADMIN_PATHS = {"/auth/admin/test"}
-UNAUTHENTICATED_ONLY_PATHS = {"/auth/login/admin", "/auth/login/user", "/auth/register"}
-AUTHENTICATED_ONLY_PATHS = {"/auth/logout", "/auth/users/me" "/account/self", "/account/self/update", "/account/delete", "/account/activity", "/account/laptops"}
+# concrete paths of templated routes that stay public; the rest of those routes
+# keep the default AUTHENTICATED policy (static segments win over {params})
+PUBLIC_PATHS = ('/documents/data', '/search/data')
 
-# rm /auth/users/me && /auth/admin/test
 
-async def auth_middleware(
-    request: Request,
-    call_next: Callable[[Request], Awaitable[Response]]
-) -> Response:
-    path = request.url.path
+class AuthMiddleware:
+    '''
+    Pure ASGI auth layer. Cookies are parsed straight from the scope headers and
+    the refreshed access token cookie is appended to the response start message,
+    so requests and responses are streamed through without extra tasks or buffers.
+    Paths are classified by a policy table compiled from the `auth_policy` marks on
+    `routes_app` routes when Starlette builds the middleware stack at startup.
+    '''
 
-    access_token = request.cookies.get('Bearer-token')
-    refresh_token = request.cookies.get('Refresh-token')
+    def __init__(self, app: ASGIApp, routes_app: FastAPI):
+        self.app = app
+        self.policies = compile_app_policies(routes_app, PUBLIC_PATHS)
 
-    current_payload: Optional[TokenPayload] = None
-    new_access_token: Optional[str] = None
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        path = scope['path']
+        policy = self.policies.lookup(path)
+        cookies = parse_scope_cookies(scope)
+        access_token = cookies.get('Bearer-token')
+        refresh_token = cookies.get('Refresh-token')
+
+        current_payload: Optional[TokenPayload] = None
+        new_access_token: Optional[str] = None
+
+        if access_token:
+            try:
+                current_payload = token_cache.decode(access_token)
+            except (ExpiredSignatureError, InvalidTokenError):
+                pass
+
+        # Handle Unauthenticated-Only Paths
+        if policy is Policy.UNAUTHENTICATED_ONLY:
+            if current_payload:
+                logger.info(f"Logged-in user {current_payload.get('sub')} attempted to access {path}")
+                await self._reject(scope, receive, send, status.HTTP_403_FORBIDDEN, 'Already logged in')
+                return
+
+            logger.debug(f"Path {path} is for unauthenticated users. Proceeding.")
+            await self.app(scope, receive, send)
+            return
+
+        # Handle Public Paths
+        if policy is Policy.PUBLIC:
+            logger.debug(f"Path {path} is public. Skipping authentication.")
+            await self.app(scope, receive, send)
+            return
+
+        # Authenticated path request with no tokens
+        if policy is Policy.AUTHENTICATED_ONLY:
+            if not access_token and not refresh_token:
+                logger.warning(f"Unauthenticated user attempted to access {path}.")
+                await self._reject(scope, receive, send, status.HTTP_401_UNAUTHORIZED, 'Authentication required to access')
+                return
+
+            logger.debug(f"Authenticated user attempting to access authenticated path {path}.")
+
+        # Handle Admin Paths
+        if policy is Policy.ADMIN:
+            if not access_token:
+                logger.warning(f"Admin path {path} request without access token.")
+                await self._reject(scope, receive, send, status.HTTP_403_FORBIDDEN, 'Admin privileges required')
+                return
+            try:
+                current_payload = token_cache.decode(access_token)
+                if current_payload.get('role') != 'admin':
+                    logger.warning(f"User {current_payload.get('sub')} attempted admin access to {path} without admin role.")
+                    await self._reject(scope, receive, send, status.HTTP_403_FORBIDDEN, 'Admin privileges required')
+                    return
+                logger.debug(f"Admin access token valid for user {current_payload.get('sub')} to {path}.")
+
+            except (ExpiredSignatureError, InvalidTokenError) as e:
+                logger.warning(f"Admin access token invalid or expired for {path}: {e}.")
+                await self._reject(scope, receive, send, status.HTTP_401_UNAUTHORIZED, 'Admin access token invalid or expired')
+                return
+
+        # Handle General Authenticated Paths
+        else:
+            if not current_payload and refresh_token:
+                try:
+                    payload = decode_jwt(refresh_token)
+                    user_id = payload.get('sub')
+
+                    uow = get_uow()
+                    async with uow:
+                        user = await uow.user_loader.load(user_id)
+                    if not user:
+                        await self._reject(scope, receive, send, status.HTTP_404_NOT_FOUND, 'User not found')
+                        return
+                    new_access_token = create_access_token(user)
+                    current_payload = token_cache.decode(new_access_token)
+                    logger.info(f"Access token refreshed for user {current_payload.get('sub')}.")
+
+                except InvalidTokenError:
+                    logger.warning(f"Failed to refresh token. Clearing tokens.")
+                    response = FastJSONResponse(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        content={"detail": 'Couldn\'t refresh access token'}
+                    )
+                    response.delete_cookie(key="Bearer-token")
+                    response.delete_cookie(key="Refresh-token")
+                    await response(scope, receive, send)
+                    return
+
+                except Exception as e:
+                    logger.error(f"Unexpected error during refresh token processing: {e}")
+                    await self._reject(scope, receive, send, status.HTTP_401_UNAUTHORIZED, 'Couldn\'t refresh access token')
+                    return
+
+        #Final Check and Request State Update
+        if not current_payload:
+            logger.warning(f"No valid tokens found for path {path}. Unauthorized access attempt.")
+            await self._reject(scope, receive, send, status.HTTP_401_UNAUTHORIZED, 'No valid tokens found, access denied')
+            return
+
+        state = scope.setdefault('state', {})
+        state['user_id'] = current_payload.get('sub')
+        state['user_payload'] = current_payload
+        state['user_role'] = current_payload.get('role')
+        # reset together with the rest of the request's context by RequestContextMiddleware
+        bind_log_context(user_id=state['user_id'])
+
+        if not new_access_token:
+            await self.app(scope, receive, send)
+            return
+
+        #Set New Access Token if Refreshed
+        cookie_headers = access_cookie_headers(new_access_token)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + cookie_headers
+                logger.debug("New access token set in response cookie.")
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str) -> None:
+        response = FastJSONResponse(status_code=status_code, content={"detail": detail})
+        await response(scope, receive, send)
+
+
+MAX_REQUEST_ID_LENGTH = 128
+
+
+class RequestContextMiddleware:
+    '''
+    Outermost layer. Binds the request id (the caller's X-Request-ID or a new one)
+    and the route to every record logged while the request is handled, echoes the
+    id back in the response and logs one access record with status and latency.
+    '''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_header(scope) or uuid.uuid4().hex
+        token = bind_log_context(request_id=request_id, route=scope['path'], method=scope['method'])
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message['headers'] = list(message.get('headers', [])) + [(b'x-request-id', request_id.encode())]
+            await send(message)
 
-    if access_token:
         try:
-            current_payload = decode_jwt(access_token)
-        except (ExpiredSignatureError, InvalidTokenError):
-            pass
-
-    # Handle Unauthenticated-Only Paths
-    if path in UNAUTHENTICATED_ONLY_PATHS:
-        if current_payload:
-            logger.info(f"Logged-in user {current_payload.get('sub')} attempted to access {path}")
-            
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content={"detail": 'Already logged in'}
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            latency_ms = round((time.perf_counter() - start) * 1000, 3)
+            logger.info(
+                f"{scope['method']} {scope['path']} {status_code} {latency_ms}ms",
+                extra={'status': status_code, 'latency_ms': latency_ms}
             )
+            reset_log_context(token)
 
-        logger.debug(f"Path {path} is for unauthenticated users. Proceeding.")
-        return await call_next(request)
-    
-    # Handle Public Paths
-    if path in PUBLIC_PATHS:
-        logger.debug(f"Path {path} is public. Skipping authentication.")
-        return await call_next(request)
-
-    # Authenticated path request with no tokens
-    if path in AUTHENTICATED_ONLY_PATHS:
-        if not access_token and not refresh_token:
-            logger.warning(f"Unauthenticated user attempted to access {path}.")
-            
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": 'Authentication required to access'}
-            )
 
-        logger.debug(f"Authenticated user attempting to access authenticated path {path}.")
-        
-    # Handle Admin Paths
-    if path in ADMIN_PATHS:
-        if not access_token:
-            logger.warning(f"Admin path {path} request without access token.")
-            
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content={"detail": 'Admin privileges required'}
-            )
-        try:
-            current_payload = decode_jwt(access_token)
-            if current_payload.get('role') != 'admin':
-                logger.warning(f"User {current_payload.get('sub')} attempted admin access to {path} without admin role.")
-                
-                return JSONResponse(
-                		status_code=status.HTTP_403_FORBIDDEN,
-                		content={"detail": 'Admin privileges required'}
-                )
-            logger.debug(f"Admin access token valid for user {current_payload.get('sub')} to {path}.")
-
-        except (ExpiredSignatureError, InvalidTokenError) as e:
-            logger.warning(f"Admin access token invalid or expired for {path}: {e}.")
-            
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": 'Admin access token invalid or expired'}
-                     )
-        
-    # Handle General Authenticated Paths
-    else:
-        if not current_payload and refresh_token:
-            try:
-                payload = decode_jwt(refresh_token)
-                user_id = payload.get('sub')
-
-                uow = get_uow()
-                async with uow:
-                    user = await uow.users.get_by_id(user_id)
-                    if user:
-                        new_access_token = create_access_token(user)
-                        current_payload = decode_jwt(new_access_token)
-                        logger.info(f"Access token refreshed for user {current_payload.get('sub')}.")
-                    else:
-                        return JSONResponse(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    content={"detail": 'User not found'}
-                           )
-            except InvalidTokenError as e:
-                logger.warning(f"Failed to refresh token. Clearing tokens.")
-                response.delete_cookie(key="Bearer-token")
-                response.delete_cookie(key="Refresh-token")
-                
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": 'Couldn\'t refresh access token'}
-                           )
-            
-            except Exception as e:
-                logger.error(f"Unexpected error during refresh token processing: {e}")
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": 'Couldn\'t refresh access token'}
-                           )
-
-    #Final Check and Request State Update
-    if not current_payload:
-        logger.warning(f"No valid tokens found for path {path}. Unauthorized access attempt.")
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"detail": 'No valid tokens found, access denied'}
-                )
-
-    request.state.user_id = current_payload.get('sub')
-    request.state.user_payload = current_payload
-    request.state.user_role = current_payload.get('role')
-
-    response = await call_next(request)
-
-    #Set New Access Token if Refreshed
-
-    if new_access_token:
-        response.set_cookie(
-            key="Bearer-token",
-            value=new_access_token,
-            httponly=True,
-            samesite="lax",
-            # secure=True, # Uncomment in production with HTTPS
-            max_age=Settings.access_token_expire_minutes * 60
-        )
-        logger.debug("New access token set in response cookie.")
-
-    return response
-
-
-app.add_middleware(BaseHTTPMiddleware, dispatch=auth_middleware)
+def request_id_header(scope: Scope) -> Optional[str]:
+    for name, value in scope['headers']:
+        if name == b'x-request-id' and 0 < len(value) <= MAX_REQUEST_ID_LENGTH:
+            return value.decode('latin-1')
+    return None
+
+
+def parse_scope_cookies(scope: Scope) -> Dict[str, str]:
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            return cookie_parser(value.decode('latin-1'))
+    return {}
+
+
+def access_cookie_headers(access_token: str) -> list[tuple[bytes, bytes]]:
+    response = Response()
+    response.set_cookie(
+        key="Bearer-token",
+        value=access_token,
+        httponly=True,
+        samesite="lax",
+        # secure=True, # Uncomment in production with HTTPS
+        max_age=Settings.access_token_expire_minutes * 60
+    )
+    return [(name, value) for name, value in response.raw_headers if name == b'set-cookie']
+
+
+app.add_middleware(AuthMiddleware, routes_app=app)
+# added last, so it wraps AuthMiddleware and times the whole request
+app.add_middleware(RequestContextMiddleware)
 
 
 
 @app.get('/healthcheck', tags=['Healthcheck'])
+@auth_policy(Policy.PUBLIC)
 def healthcheck():
     return {'Status': 'healthy'}
 
+@app.get('/metrics/db-pool', tags=['Metrics'])
+@auth_policy(Policy.ADMIN)
+def db_pool_metrics():
+    return get_pool_metrics()
+
+@app.get('/metrics/password-hasher', tags=['Metrics'])
+@auth_policy(Policy.ADMIN)
+def password_hasher_metrics():
+    return password_hasher.metrics()
+
+@app.get('/metrics/jwt-cache', tags=['Metrics'])
+@auth_policy(Policy.ADMIN)
+def jwt_cache_metrics():
+    return token_cache.metrics()
+
+@app.get('/metrics/logging', tags=['Metrics'])
+@auth_policy(Policy.ADMIN)
+def logging_queue_metrics():
+    return logging_metrics()
+
 @app.get('/error', tags=['Troubleshoot'])
 def error(es: ElasticDep):
     raise HTTPException(
@@ -289,12 +393,14 @@ def error(es: ElasticDep):
 	 )
 
 @app.get('/rmq_send')
+@auth_policy(Policy.PUBLIC)
 async def send():
     from src.infrastructure.rabbitmq.publisher import RabbitMQPublisher
     await RabbitMQPublisher().send_message('Elastic-queue', {'status': 'success'})
     return {'status': 'success'}
 
 @app.get('/rmq_consume')
+@auth_policy(Policy.PUBLIC)
 async def consume():
     from src.infrastructure.rabbitmq.consumer import RabbitMQConsumer
     await RabbitMQConsumer().consume_messages('Elastic-queue')
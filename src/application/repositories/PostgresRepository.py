@@ -1,32 +1,198 @@
-from typing import List, Optional, Type
-from src.core.interfaces.AbstractDatabase import ReadRepository, WriteRepository, FullRepository
-from sqlalchemy import delete, select, update
+from typing import Iterator, List, Optional, Sequence, Type
+from src.core.interfaces.AbstractDatabase import ReadRepository, WriteRepository, FullRepository, BulkUpsertRepository, BulkWriteRepository
+from sqlalchemy import Integer, Result, Row, ScalarResult, Select, any_, bindparam, delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.utils.logger import logger
-from src.infrastructure.db.models import UserOrm, LaptopOrm
+from src.utils.search import SearchMode, search_clause
+from src.infrastructure.db.models import Base, UserOrm, LaptopOrm
 
 
-class UserRepository(FullRepository):
+DEFAULT_BULK_CHUNK_SIZE = 1000
+
+USER_PUBLIC_FIELDS = ('id', 'username', 'email', 'active')
+
+USER_SEARCH_FIELDS = ('id', 'username', 'email')
+
+Projection = Optional[Sequence[str]]
+
+
+def _chunked(rows: Sequence[dict], chunk_size: int) -> Iterator[Sequence[dict]]:
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+
+def _dedupe(rows: Sequence[dict], conflict_on: Sequence[str]) -> List[dict]:
+    '''
+    One row per conflict key, the last one winning: ON CONFLICT DO UPDATE can not
+    affect the same row twice in one statement. Keys keep their first position.
+    '''
+    latest: dict = {}
+    for row in rows:
+        latest[tuple(row[column] for column in conflict_on)] = row
+    return list(latest.values())
+
+
+class BulkWriteMixin(BulkWriteRepository):
+    '''
+    Multi-row INSERT for repositories holding `_session` and `model`.
+    Every chunk is one statement and one round-trip; rows in a chunk must share keys.
+    asyncpg caps a statement at 32767 bind parameters, so chunk_size * columns must stay below it.
+    '''
+    _session: AsyncSession
+    model: Type[Base]
+    bulk_chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+    conflict_on: Sequence[str] = ('id',)
+
+    async def add_many(
+        self,
+        rows: Sequence[dict],
+        chunk_size: Optional[int] = None,
+        skip_conflicts: bool = False
+    ) -> List[int]:
+        ids: List[int] = []
+        for chunk in _chunked(rows, chunk_size or self.bulk_chunk_size):
+            query = insert(self.model).values(list(chunk))
+            if skip_conflicts:
+                query = query.on_conflict_do_nothing(index_elements=list(self.conflict_on))
+            result = await self._session.execute(query.returning(self.model.id))
+            ids.extend(result.scalars().all())
+        logger.debug(f"Bulk inserted {len(ids)} of {len(rows)} rows into {self.model.__tablename__}")
+        return ids
+
+
+
+class BulkUpsertMixin(BulkWriteMixin, BulkUpsertRepository):
+    '''
+    INSERT ... ON CONFLICT DO UPDATE on top of BulkWriteMixin. Only for models
+    whose `conflict_on` columns are a real natural key with a unique index.
+    '''
+
+    async def upsert_many(
+        self,
+        rows: Sequence[dict],
+        chunk_size: Optional[int] = None,
+        conflict_on: Optional[Sequence[str]] = None
+    ) -> List[int]:
+        '''
+        Returns the id of every distinct conflict key in input order, whether the
+        row was inserted, updated or, with nothing to update, already existed.
+        '''
+        conflict_on = list(conflict_on or self.conflict_on)
+        key_columns = [getattr(self.model, column) for column in conflict_on]
+        # over the whole input, so a key repeated across chunks is written once
+        unique_rows = _dedupe(rows, conflict_on)
+        ids: List[int] = []
+        for chunk in _chunked(unique_rows, chunk_size or self.bulk_chunk_size):
+            query = insert(self.model).values(list(chunk))
+            update_columns = {
+                column: query.excluded[column]
+                for column in chunk[0].keys()
+                if column not in conflict_on and column != 'id'
+            }
+            if update_columns:
+                query = query.on_conflict_do_update(index_elements=conflict_on, set_=update_columns)
+            else:
+                query = query.on_conflict_do_nothing(index_elements=conflict_on)
+            result = await self._session.execute(query.returning(self.model.id, *key_columns))
+            key_ids = {tuple(row[1:]): row[0] for row in result}
+
+            keys = [tuple(row[column] for column in conflict_on) for row in chunk]
+            existing = [key for key in keys if key not in key_ids]
+            if existing:
+                # DO NOTHING returns no row for keys that were already there
+                result = await self._session.execute(
+                    select(self.model.id, *key_columns).where(tuple_(*key_columns).in_(existing))
+                )
+                key_ids.update((tuple(row[1:]), row[0]) for row in result)
+            ids.extend(key_ids[key] for key in keys)
+        logger.debug(f"Bulk upserted {len(ids)} of {len(rows)} rows into {self.model.__tablename__}")
+        return ids
+
+
+class ProjectionMixin:
+    '''
+    Read methods take an optional projection: a sequence of column names.
+    With a projection only those columns are selected and plain Row tuples are
+    returned, bypassing ORM instance construction, instrumentation and the identity map.
+    '''
+    model: Type[Base]
+
+    def _select(self, projection: Projection) -> Select:
+        if projection is None:
+            return select(self.model)
+        return select(*(getattr(self.model, field) for field in projection))
+
+    @staticmethod
+    def _rows(result: Result, projection: Projection) -> Result | ScalarResult:
+        return result if projection is not None else result.scalars()
+
+
+class UserRepository(ProjectionMixin, BulkUpsertMixin, FullRepository):
+    conflict_on = ('username',)
     
-    def __init__(self, _session: AsyncSession, model: Type[UserOrm]):
+    def __init__(self, _session: AsyncSession, model: Type[UserOrm], bulk_chunk_size: int = DEFAULT_BULK_CHUNK_SIZE):
         self._session = _session
         self.model = model
+        self.bulk_chunk_size = bulk_chunk_size
 
-    async def get_by_id(self, user_id: int) -> UserOrm | None:
+    async def get_by_id(self, user_id: int, projection: Projection = None) -> UserOrm | Row | None:
         query = (
-            select(self.model)
+            self._select(projection)
             .where(self.model.id == user_id)
         )
         result = await self._session.execute(query)
-        return result.scalars().first()
+        return self._rows(result, projection).first()
 
-    async def get_all(self, offset: int, limit: int, only_active: bool) -> List[UserOrm]:
-          query = select(self.model)
+    async def get_by_ids(self, user_ids: Sequence[int], projection: Projection = None) -> List[UserOrm | Row]:
+        # one array parameter keeps the statement text identical for any number of ids
+        query = (
+            self._select(projection)
+            .where(self.model.id == any_(bindparam('user_ids', list(user_ids), type_=ARRAY(Integer))))
+        )
+        result = await self._session.execute(query)
+        return self._rows(result, projection).all()
+
+    async def get_all(self, offset: int, limit: int, only_active: bool = False, projection: Projection = None) -> List[UserOrm | Row]:
+          query = self._select(projection)
           if only_active:
-                query = query.where(self.model.is_active == True)
-          query = query.limit(limit).offset(offset)
+                query = query.where(self.model.active == True)
+          query = query.order_by(self.model.id).limit(limit).offset(offset)
           result = await self._session.execute(query)
-          return result.scalars().all()
+          return self._rows(result, projection).all()
+
+    async def get_all_after(self, after_id: Optional[int], limit: int, only_active: bool = False, projection: Projection = None) -> List[UserOrm | Row]:
+        '''Keyset page: seeks on the primary key index instead of scanning skipped rows'''
+        query = self._select(projection)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        if only_active:
+            query = query.where(self.model.active == True)
+        query = query.order_by(self.model.id).limit(limit)
+        result = await self._session.execute(query)
+        return self._rows(result, projection).all()
+
+    async def search_users(
+        self,
+        field: str,
+        query: str | int,
+        mode: SearchMode | str = SearchMode.EXACT,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        projection: Projection = None
+    ) -> List[UserOrm | Row]:
+        '''
+        Matches are filtered in SQL and paged with a keyset on id, in every mode.
+        Raises ValueError for a field outside USER_SEARCH_FIELDS or an unsupported mode.
+        '''
+        if field not in USER_SEARCH_FIELDS:
+            raise ValueError(f'Users can not be searched by {field}')
+        statement = self._select(projection).where(search_clause(getattr(self.model, field), query, mode))
+        if after_id is not None:
+            statement = statement.where(self.model.id > after_id)
+        statement = statement.order_by(self.model.id).limit(limit)
+        result = await self._session.execute(statement)
+        return self._rows(result, projection).all()
     
     async def add(self, user_data: dict) -> None:
         new_user = self.model(
@@ -44,16 +210,18 @@ class UserRepository(FullRepository):
         await self._session.execute(query)
         
 
-class LaptopRepository(FullRepository):
+# laptops have no natural key (a user may save the same template twice), so no upsert
+class LaptopRepository(ProjectionMixin, BulkWriteMixin, FullRepository):
     
-    def __init__(self, _session: AsyncSession, model: Type[LaptopOrm]):
+    def __init__(self, _session: AsyncSession, model: Type[LaptopOrm], bulk_chunk_size: int = DEFAULT_BULK_CHUNK_SIZE):
         self._session = _session
         self.model = model 
+        self.bulk_chunk_size = bulk_chunk_size
 
-    async def get_by_id(self, user_id: int) -> LaptopOrm | None:
-        query = select(self.model).where(self.model.user_id == user_id)
+    async def get_by_id(self, user_id: int, projection: Projection = None) -> LaptopOrm | Row | None:
+        query = self._select(projection).where(self.model.user_id == user_id)
         result = await self._session.execute(query)
-        return result.scalars().first()
+        return self._rows(result, projection).first()
 
     async def add(self, laptop_data: dict) -> None:
         new_laptop = self.model(
@@ -7,7 +7,7 @@ from src.core.exceptions.exceptions import LaptopNotFoundException, LaptopTempla
 class LaptopService:
 	async def add(self, uow: SQLAlchemyUoW, data: LaptopAddSchema):
 		async with uow:
-			user = uow.users.get_by_id(data.user_id)
+			user = await uow.user_loader.load(data.user_id)
 			if not user:
 				raise UserNotFoundException(f'User not found with ID {data.user_id}')
 			user_laptops = await uow.laptops.get_by_owner_id(data.user_id)
@@ -23,7 +23,7 @@ class LaptopService:
 		
 	async def get_list_for_user(self, uow: SQLAlchemyUoW, user_id: int):
 		async with uow:
-			user_owner = await uow.users.get_by_id(user_id)
+			user_owner = await uow.user_loader.load(user_id)
 			if not user_owner:
 				raise UserNotFoundException(f'User not found with ID {user_id}')
 			result = await uow.laptops.get_list_by_owner_id(user_id)
@@ -31,7 +31,7 @@ class LaptopService:
 		
 	async def get_exact(self, uow: SQLAlchemyUoW, user_id: int, laptop_id: int):
 		async with uow:
-			user_owner = await uow.users.get_by_id(user_id)
+			user_owner = await uow.user_loader.load(user_id)
 			if not user_owner:
 				raise UserNotFoundException(f'User not found with ID {user_id}')
 			laptop = await uow.laptops.get_by_id_and_owner_id(user_id, laptop_id)
@@ -42,7 +42,7 @@ class LaptopService:
 	async def update(self, uow: SQLAlchemyUoW, data: LaptopUpdateSchema):
 		async with uow:
 
-			user_owner = await uow.users.get_by_id(data.user_id)
+			user_owner = await uow.user_loader.load(data.user_id)
 			if not user_owner:
 				logger.warning(f"Update attempt for laptop with non-existent owner ID: {data.user_id}")
 				raise UserNotFoundException(f'User not found with ID {data.user_id}')
@@ -75,7 +75,7 @@ class LaptopService:
 		
 	async def delete(self, uow: SQLAlchemyUoW, data: LaptopDeleteSchema):
 		async with uow:
-			user = await uow.users.get_by_id(data.user_id)
+			user = await uow.user_loader.load(data.user_id)
 			if not user:
 				raise UserNotFoundException(f'User not found with ID {data.user_id}')
 			laptops = await uow.laptops.get_by_owner_id(data.user_id)
@@ -1,34 +1,96 @@
-from typing import List
+from typing import List, Optional, Sequence
 
 from fastapi import HTTPException, status
-from src.presentation.dto.schemas import RegisterRequestSchema, UserResponseDto, UserUpdateSchema
+from src.presentation.dto.schemas import RegisterRequestSchema, UserListDto, UserPageDto, UserResponseDto, UserUpdateSchema
+from src.application.repositories.PostgresRepository import USER_PUBLIC_FIELDS
+from src.utils.search import SearchMode
+from src.utils.cache_invalidation import USERS_CACHE_TAG, cache_invalidator
 from src.utils.UnitOfWork import UnitOfWork
 from src.utils.logger import logger
-from src.presentation.api.auth_service.utils import hash_password, validate_password
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.presentation.api.auth_service.utils import password_hasher
 
 
 USER_ROLE = 'user'
 
+
+USER_DTO_FIELDS = tuple(UserResponseDto.model_fields)
+
+
+def to_user_dtos(rows: Sequence) -> List[UserResponseDto]:
+    '''
+    DTOs for projected rows (or ORM entities) read from our own database. The
+    values were validated on the way in, and revalidating EmailStr costs far more
+    than building the model, so the DTOs are constructed without validation.
+    '''
+    construct = UserResponseDto.model_construct
+    return [construct(**{field: getattr(row, field) for field in USER_DTO_FIELDS}) for row in rows]
+
+
 class UserService:
 
     async def add(self, uow: UnitOfWork, data: RegisterRequestSchema):
           register_data = data.model_dump()
-          register_data.password = hash_password(data.password)
+          register_data.password = await password_hasher.hash(data.password)
           register_data.role = USER_ROLE
           register_data.active = True
           async with uow:
                 await uow.users.add(register_data)
           logger.info(f"User created with username: {data.username}")
 
-    async def get_all(self, uow: UnitOfWork, offset: int = 0, limit: int = 10) -> List[UserResponseDto]:
+    async def get_all(
+        self,
+        uow: UnitOfWork,
+        offset: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        keyset: bool = False
+    ) -> UserListDto | UserPageDto:
+        if keyset or cursor is not None:
+            return await self._get_page(uow, limit, cursor)
         async with uow:
-            db_users = await uow.users.get_all(offset, limit)
+            db_users = await uow.users.get_all(offset, limit, projection=USER_PUBLIC_FIELDS)
             logger.info("Fetched all users successfully.")
-            return [UserResponseDto.model_validate(user) for user in db_users]
+        # the response serializes the wrapped list in one pydantic call
+        return UserListDto.model_construct(to_user_dtos(db_users))
+
+    async def _get_page(self, uow: UnitOfWork, limit: int, cursor: Optional[str]) -> UserPageDto:
+        after_id = decode_cursor(cursor)
+        async with uow:
+            # one extra row tells whether a next page exists without a COUNT(*)
+            db_users = await uow.users.get_all_after(after_id, limit + 1, projection=USER_PUBLIC_FIELDS)
+        has_more = len(db_users) > limit
+        db_users = db_users[:limit]
+        next_cursor = encode_cursor(db_users[-1].id) if has_more else None
+        logger.info(f"Fetched users page after ID {after_id}, has more: {has_more}")
+        return UserPageDto.model_construct(items=to_user_dtos(db_users), next_cursor=next_cursor)
+
+    async def search(
+        self,
+        uow: UnitOfWork,
+        field: str,
+        query: str,
+        mode: SearchMode = SearchMode.EXACT,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> UserPageDto:
+        after_id = decode_cursor(cursor)
+        async with uow:
+            try:
+                db_users = await uow.users.search_users(field, query, mode, after_id, limit + 1, projection=USER_PUBLIC_FIELDS)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        has_more = len(db_users) > limit
+        db_users = db_users[:limit]
+        logger.info(f"Searched users by {field} ({mode}), found {len(db_users)}, has more: {has_more}")
+        return UserPageDto.model_construct(
+            items=to_user_dtos(db_users),
+            next_cursor=encode_cursor(db_users[-1].id) if has_more else None
+        )
 
     async def get_by_id(self, uow: UnitOfWork, user_id: int) -> UserResponseDto | None:
         async with uow:
-            db_user = await uow.users.get_by_id(user_id)
+            db_user = await uow.user_view_loader.load(user_id)
             if not db_user:
                 logger.debug(f"No user found with ID: {user_id}")
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -40,9 +102,15 @@ class UserService:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is inactive")
             return user
 
+    async def get_by_ids(self, uow: UnitOfWork, user_ids: List[int]) -> List[UserResponseDto]:
+        async with uow:
+            db_users = await uow.user_view_loader.load_many(user_ids)
+            logger.info(f"Fetched {len(user_ids)} users by ID in one batch.")
+            return to_user_dtos([user for user in db_users if user])
+
     async def update(self, uow: UnitOfWork, data: UserUpdateSchema):
         async with uow:
-            user = await uow.users.get_by_id(data.id)
+            user = await uow.user_loader.load(data.id)
             
             if not user:
                  logger.warning(f"Update attempt for non-existent user ID: {data.id}")
@@ -61,7 +129,7 @@ class UserService:
                  raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields provided for update")
             
             if 'password' in update_data_dict:
-                 hashed_password = hash_password(update_data_dict.get('password'))
+                 hashed_password = await password_hasher.hash(update_data_dict.get('password'))
                  update_data_dict['hashed_password'] = hashed_password
                  del update_data_dict['password']
                  
@@ -77,16 +145,20 @@ class UserService:
                  raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No actual changes provided") 
             
             await uow.users.update(data.id, update_data_dict)
-            logger.info(f"User with ID {data.id} successfully updated. Changed fields: {list(update_data_dict.keys())}")
+        # after the unit of work committed, so no worker re-caches the old row
+        await cache_invalidator.invalidate(USERS_CACHE_TAG)
+        logger.info(f"User with ID {data.id} successfully updated. Changed fields: {list(update_data_dict.keys())}")
 
     async def delete(self, uow: UnitOfWork, user_id: int):
         async with uow:
-            user_to_delete = await uow.users.get_by_id(user_id)
+            user_to_delete = await uow.user_loader.load(user_id)
             if not user_to_delete:
                 logger.warning(f"Delete attempt for non-existent user ID: {user_id}")
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
             if not user_to_delete.active:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User inactive")
             await uow.users.delete(user_id)
+            uow.user_loader.clear(user_id)
             await uow.commit()
-            logger.info(f"User with ID {user_id} successfully deleted.")
\ No newline at end of file
+        await cache_invalidator.invalidate(USERS_CACHE_TAG)
+        logger.info(f"User with ID {user_id} successfully deleted.")
\ No newline at end of file
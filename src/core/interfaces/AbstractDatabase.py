@@ -1,4 +1,4 @@
-from typing import Any, Protocol
+from typing import Any, Optional, Protocol, Sequence
 
 class ReadRepository(Protocol):
 	async def get_by_id(self, user_id: int) -> Any:...
@@ -9,4 +9,10 @@ class WriteRepository(Protocol):
 
 class FullRepository(ReadRepository, WriteRepository, Protocol):
 	async def update(self, data: Any) -> None: ...
-	async def delete(self, data: Any) -> None: ...
\ No newline at end of file
+	async def delete(self, data: Any) -> None: ...
+
+class BulkWriteRepository(Protocol):
+	async def add_many(self, rows: Sequence[Any], chunk_size: Optional[int] = None) -> list[int]: ...
+
+class BulkUpsertRepository(BulkWriteRepository, Protocol):
+	async def upsert_many(self, rows: Sequence[Any], chunk_size: Optional[int] = None) -> list[int]: ...
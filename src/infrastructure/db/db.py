@@ -1,10 +1,46 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from config.settings import Settings
+from src.infrastructure.db.pool_metrics import InstrumentedQueuePool
+from src.infrastructure.db.routing import ReplicaRouter
 
-engine = create_async_engine(Settings.postgres_async_url, echo=True)
+
+def make_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=Settings.postgres_echo,
+        poolclass=InstrumentedQueuePool,
+        pool_size=Settings.postgres_pool_size,
+        max_overflow=Settings.postgres_max_overflow,
+        pool_timeout=Settings.postgres_pool_timeout,
+        pool_recycle=Settings.postgres_pool_recycle,
+        pool_pre_ping=Settings.postgres_pool_pre_ping,
+        connect_args={
+            'prepared_statement_cache_size': Settings.postgres_statement_cache_size,
+            'command_timeout': Settings.postgres_command_timeout,
+            'server_settings': {'statement_timeout': str(Settings.postgres_statement_timeout_ms)},
+        },
+    )
+
+
+engine = make_engine(Settings.postgres_async_url)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engines = [make_engine(url) for url in Settings.postgres_replica_async_urls]
+replica_router = ReplicaRouter(
+    async_session_maker,
+    replica_engines,
+    strategy=Settings.postgres_replica_strategy,
+    retry_after=Settings.postgres_replica_retry_seconds,
+)
+
+
+def get_pool_metrics() -> dict:
+    metrics = {'primary': engine.pool.metrics.snapshot(engine.pool)}
+    for replica in replica_engines:
+        metrics[f'replica:{replica.url.host}:{replica.url.port}'] = replica.pool.metrics.snapshot(replica.pool)
+    return metrics
+
 
 async def get_async_session():
     async with async_session_maker() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class LazySession:
+	'''
+	Stands in for AsyncSession inside repositories. The real session, and with it
+	a pool connection, is only opened by the first statement; objects added before
+	that are buffered until the session exists.
+	Tracks whether anything was written so the unit of work can skip an empty COMMIT.
+
+	AsyncSession can not run two statements at once, so statements issued
+	concurrently through the proxy (gathered loaders, parallel repository calls)
+	are serialized here, for every caller sharing the unit of work.
+	'''
+
+	def __init__(self, open_session: Callable[[], Awaitable[AsyncSession]]):
+		self._open_session = open_session
+		self._pending: List[Any] = []
+		self.session: Optional[AsyncSession] = None
+		self.wrote = False
+		self._open_lock = asyncio.Lock()
+		self._statement_lock = asyncio.Lock()
+
+	async def get(self) -> AsyncSession:
+		if self.session is None:
+			# two first statements racing would each open a session and leak one
+			async with self._open_lock:
+				if self.session is None:
+					session = await self._open_session()
+					if self._pending:
+						session.add_all(self._pending)
+						self._pending.clear()
+					self.session = session
+		return self.session
+
+	async def execute(self, statement, *args, **kwargs):
+		if getattr(statement, 'is_dml', False):
+			self.wrote = True
+		async with self._statement_lock:
+			session = await self.get()
+			return await session.execute(statement, *args, **kwargs)
+
+	async def commit(self) -> None:
+		async with self._statement_lock:
+			session = await self.get()
+			await session.commit()
+		self.wrote = False
+
+	async def rollback(self) -> None:
+		if self.session is None:
+			return
+		async with self._statement_lock:
+			await self.session.rollback()
+
+	def add(self, instance: Any) -> None:
+		self.wrote = True
+		if self.session is None:
+			self._pending.append(instance)
+		else:
+			self.session.add(instance)
+
+	@property
+	def opened(self) -> bool:
+		return self.session is not None
+
+	@property
+	def has_changes(self) -> bool:
+		if self._pending:
+			return True
+		if self.session is None:
+			return False
+		return self.wrote or bool(self.session.new or self.session.dirty or self.session.deleted)
+
+	async def close(self) -> None:
+		self._pending.clear()
+		if self.session is not None:
+			await self.session.close()
+			self.session = None
+		self.wrote = False
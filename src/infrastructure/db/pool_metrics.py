@@ -0,0 +1,58 @@
+import time
+from typing import Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+	'''Counters collected by InstrumentedQueuePool, read through `snapshot`'''
+
+	def __init__(self):
+		self.checkouts = 0
+		self.overflow_checkouts = 0
+		self.timeouts = 0
+		self.wait_time_total = 0.0
+		self.wait_time_max = 0.0
+
+	def record_checkout(self, wait_time: float, overflowed: bool) -> None:
+		self.checkouts += 1
+		self.wait_time_total += wait_time
+		self.wait_time_max = max(self.wait_time_max, wait_time)
+		if overflowed:
+			self.overflow_checkouts += 1
+
+	def snapshot(self, pool: 'InstrumentedQueuePool') -> Dict[str, float]:
+		return {
+			'pool_size': pool.size(),
+			'checked_out': pool.checkedout(),
+			'idle': pool.checkedin(),
+			'overflow': max(pool.overflow(), 0),
+			'checkouts': self.checkouts,
+			'overflow_checkouts': self.overflow_checkouts,
+			'timeouts': self.timeouts,
+			'wait_time_avg_ms': self.wait_time_total / self.checkouts * 1000 if self.checkouts else 0.0,
+			'wait_time_max_ms': self.wait_time_max * 1000,
+		}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+	'''AsyncAdaptedQueuePool timing how long each checkout waits for a free connection'''
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.metrics = PoolMetrics()
+
+	def _do_get(self):
+		start = time.perf_counter()
+		overflow_before = self.overflow()
+		try:
+			connection = super()._do_get()
+		except PoolTimeoutError:
+			self.metrics.timeouts += 1
+			raise
+		# the counter goes up only when a new connection is opened; past pool_size
+		# that connection is an overflow one, reused idle connections leave it as is
+		overflow_after = self.overflow()
+		self.metrics.record_checkout(time.perf_counter() - start, overflow_after > max(overflow_before, 0))
+		return connection
@@ -0,0 +1,80 @@
+import itertools
+import time
+from typing import Callable, Dict, List, Sequence
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.utils.logger import logger
+
+
+ROUND_ROBIN = 'round_robin'
+LEAST_CONNECTIONS = 'least_connections'
+
+
+class ReplicaRouter:
+	'''
+	Hands out sessions bound to read replicas.
+
+	Replicas are picked round-robin or by the fewest checked-out pool connections.
+	A replica whose connection fails is skipped for `retry_after` seconds, and when
+	no replica is usable the session is bound to the primary.
+	'''
+
+	def __init__(
+		self,
+		primary_session_maker: async_sessionmaker,
+		replicas: Sequence[AsyncEngine],
+		strategy: str = ROUND_ROBIN,
+		retry_after: float = 30,
+		clock: Callable[[], float] = time.monotonic
+	):
+		if strategy not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+			raise ValueError(f'Unknown replica selection strategy: {strategy}')
+		self._primary_session_maker = primary_session_maker
+		self._replicas = list(replicas)
+		self._session_makers = {
+			id(engine): async_sessionmaker(engine, expire_on_commit=False)
+			for engine in self._replicas
+		}
+		self._strategy = strategy
+		self._retry_after = retry_after
+		self._clock = clock
+		self._round_robin = itertools.count()
+		self._failed_at: Dict[int, float] = {}
+
+	@property
+	def replicas(self) -> List[AsyncEngine]:
+		return list(self._replicas)
+
+	def _healthy(self) -> List[AsyncEngine]:
+		now = self._clock()
+		return [
+			engine for engine in self._replicas
+			if now - self._failed_at.get(id(engine), float('-inf')) >= self._retry_after
+		]
+
+	def _ordered_candidates(self) -> List[AsyncEngine]:
+		healthy = self._healthy()
+		if not healthy:
+			return []
+		if self._strategy == LEAST_CONNECTIONS:
+			return sorted(healthy, key=lambda engine: engine.pool.checkedout())
+		start = next(self._round_robin) % len(healthy)
+		return healthy[start:] + healthy[:start]
+
+	async def session(self) -> AsyncSession:
+		for engine in self._ordered_candidates():
+			session = self._session_makers[id(engine)]()
+			try:
+				# checks a connection out now so a dead replica is detected before any query
+				await session.connection()
+				return session
+			except (OperationalError, DBAPIError, OSError) as e:
+				await session.close()
+				self._failed_at[id(engine)] = self._clock()
+				logger.warning(f"Read replica {engine.url.host} unavailable, skipping for {self._retry_after}s: {e}")
+
+		if self._replicas:
+			logger.warning("No read replica available, routing read-only unit of work to primary")
+		return self._primary_session_maker()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Request
-from src.presentation.dependencies import UoWDep
+from src.presentation.dependencies import ReadUoWDep
+from src.presentation.policies import Policy, auth_policy
+from src.presentation.responses import FastJSONRoute
 from src.application.services.UserService import UserService
 
-AccountRouter = APIRouter(prefix='/account', tags=['Account'])
+AccountRouter = APIRouter(prefix='/account', tags=['Account'], route_class=FastJSONRoute)
 
 '''
 /account/self GET
@@ -13,7 +15,8 @@ AccountRouter = APIRouter(prefix='/account', tags=['Account'])
 '''
 
 @AccountRouter.get('/self')
-async def get_profile(request: Request, uow: UoWDep):
+@auth_policy(Policy.AUTHENTICATED_ONLY)
+async def get_profile(request: Request, uow: ReadUoWDep):
 	user_id = request.state.user_id
 	user = await UserService().get_by_id(uow, user_id)
 	return user.model_dump(exclude={'id', 'active', 'laptop_templates', 'user_activity'})
@@ -3,8 +3,7 @@ from fastapi import HTTPException, Request, Response, status, APIRouter
 from src.presentation.api.auth_service.utils import (
 	create_access_token,
 	create_refresh_token,
-	validate_password,
-	hash_password,
+	password_hasher,
 	decode_jwt,
    create_admin_access_token,
    create_admin_refresh_token
@@ -13,10 +12,12 @@ from src.presentation.api.auth_service.utils import (
 from src.presentation.dto.schemas import AdminLoginSchema, UserAddSchema, UserLoginSchema
 from src.application.services.UserService import UserService
 from src.presentation.dependencies import UoWDep
+from src.presentation.policies import Policy, auth_policy
+from src.presentation.responses import FastJSONRoute
 from src.utils.logger import logger
 from config.settings import Settings
 
-AuthRouter = APIRouter(prefix='/auth', tags=['Auth'])
+AuthRouter = APIRouter(prefix='/auth', tags=['Auth'], route_class=FastJSONRoute)
 
 
 '''
@@ -28,15 +29,17 @@ AuthRouter = APIRouter(prefix='/auth', tags=['Auth'])
 
 
 @AuthRouter.post('/register')
+@auth_policy(Policy.UNAUTHENTICATED_ONLY)
 async def register(data: UserAddSchema, uow: UoWDep):
 	await UserService().add(uow, data)
 	return {'status': 'success'}
 
 
 @AuthRouter.post('/login/user')
+@auth_policy(Policy.UNAUTHENTICATED_ONLY)
 async def login_user(data: UserLoginSchema, uow: UoWDep, response: Response):
 	user = await UserService().get_by_username(uow, data.username)
-	if not validate_password(data.password, user.hashed_password):
+	if not await password_hasher.verify(data.password, user.hashed_password):
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Incorrect credentials')
 	access_token = create_access_token(user)
 	refresh_token = create_refresh_token(user)
@@ -46,6 +49,7 @@ async def login_user(data: UserLoginSchema, uow: UoWDep, response: Response):
 
 
 @AuthRouter.post('/login/admin')
+@auth_policy(Policy.UNAUTHENTICATED_ONLY)
 async def login_user(data: AdminLoginSchema, response: Response):
 	if not data.password == Settings.admin_password and not data.name == Settings.admin_name and not data.admin_secret == Settings.admin_secret:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Incorrect credentials')
@@ -56,16 +60,19 @@ async def login_user(data: AdminLoginSchema, response: Response):
 	return {'status': 'success'}
 
 @AuthRouter.post('/logout')
+@auth_policy(Policy.AUTHENTICATED_ONLY)
 async def logout(response: Response):
 	response.delete_cookie('Bearer-token')
 	response.delete_cookie('Refresh-token')
 	return {'status': 'success'}
 
 @AuthRouter.get('/users/me')
+@auth_policy(Policy.AUTHENTICATED_ONLY)
 async def get_profile(request: Request):
      return {'payload': request.state.user_payload}
 
 @AuthRouter.get('/admin/test')
+@auth_policy(Policy.ADMIN)
 async def test_admin_middleware():
      return {'msg': 'seems like you are admin'}
 
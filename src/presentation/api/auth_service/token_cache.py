@@ -0,0 +1,87 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from config.settings import Settings
+from src.presentation.api.auth_service.utils import decode_jwt
+
+
+class VerifiedTokenCache:
+	'''
+	Bounded LRU of JWT payloads whose signature was already verified, keyed by
+	the SHA-256 of the token. An entry lives until the token's `exp`, so a cached
+	token can never outlive its validity; expired or unknown tokens go through
+	full verification (and raise as decode_jwt does).
+	'''
+
+	def __init__(
+		self,
+		max_size: int = Settings.jwt_cache_size,
+		enabled: bool = Settings.jwt_cache_enabled,
+		decode: Callable[[str], dict] = decode_jwt,
+		clock: Callable[[], float] = time.time
+	):
+		self.max_size = max_size
+		self.enabled = enabled
+		self._decode = decode
+		self._clock = clock
+		self._entries: OrderedDict[bytes, Tuple[dict, float]] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	@staticmethod
+	def _key(token: str | bytes) -> bytes:
+		if isinstance(token, str):
+			token = token.encode()
+		return hashlib.sha256(token).digest()
+
+	def _lookup(self, key: bytes) -> Optional[dict]:
+		entry = self._entries.get(key)
+		if entry is None:
+			return None
+		payload, expires_at = entry
+		if expires_at <= self._clock():
+			del self._entries[key]
+			return None
+		self._entries.move_to_end(key)
+		return payload
+
+	def decode(self, token: str | bytes) -> dict:
+		if not self.enabled:
+			return self._decode(token)
+
+		key = self._key(token)
+		payload = self._lookup(key)
+		if payload is not None:
+			self.hits += 1
+			return dict(payload)
+
+		self.misses += 1
+		payload = self._decode(token)
+		expires_at = payload.get('exp')
+		if expires_at is not None:
+			self._entries[key] = (dict(payload), float(expires_at))
+			if len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+		return payload
+
+	def clear(self) -> None:
+		self._entries.clear()
+
+	def metrics(self) -> dict:
+		lookups = self.hits + self.misses
+		return {
+			'enabled': self.enabled,
+			'size': len(self._entries),
+			'max_size': self.max_size,
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+			'hit_ratio': self.hits / lookups if lookups else 0.0,
+		}
+
+
+token_cache = VerifiedTokenCache()
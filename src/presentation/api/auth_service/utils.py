@@ -1,7 +1,10 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import uuid
 import jwt
 import bcrypt
+from fastapi import HTTPException, status
 from src.core.entities.entities import User
 from config.settings import Settings
 
@@ -72,7 +75,7 @@ def encode_jwt(
 		jti=jti
 		)
 	encoded = jwt.encode(
-		payload=payload,
+		payload=to_encode,
 		algorithm=algorithm,
 		key=private_key
 	)
@@ -94,9 +97,10 @@ def decode_jwt(
 
 
 def hash_password(
-		password: str
+		password: str,
+		rounds: int = Settings.bcrypt_rounds
 ) -> bytes:
-	salt = bcrypt.gensalt()
+	salt = bcrypt.gensalt(rounds=rounds)
 	pwd_bytes: bytes = password.encode()
 	return bcrypt.hashpw(pwd_bytes, salt)
 
@@ -109,3 +113,68 @@ def validate_password(
 		password=password.encode(),
 		hashed_password=hashed_password
 	)
+
+
+class PasswordHasher:
+	'''
+	Runs bcrypt in a bounded thread pool so hashing never blocks the event loop
+	(bcrypt releases the GIL while hashing). At most `max_workers` hashes run at once;
+	once `max_queue` calls are waiting or running, new ones are rejected with 503.
+	The pool is created on first use, so the hasher works again after shutdown()
+	(a new app lifespan, or every TestClient in the tests).
+	'''
+
+	def __init__(
+		self,
+		rounds: int = Settings.bcrypt_rounds,
+		max_workers: int = Settings.password_hash_workers,
+		max_queue: int = Settings.password_hash_max_queue
+	):
+		self.rounds = rounds
+		self.max_workers = max_workers
+		self.max_queue = max_queue
+		self._executor: ThreadPoolExecutor | None = None
+		self.queue_depth = 0
+		self.rejected = 0
+		self.completed = 0
+
+	def _get_executor(self) -> ThreadPoolExecutor:
+		if self._executor is None:
+			self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+		return self._executor
+
+	async def _run(self, func, *args):
+		if self.queue_depth >= self.max_queue:
+			self.rejected += 1
+			raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Too many password operations in progress')
+		self.queue_depth += 1
+		try:
+			result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+		finally:
+			self.queue_depth -= 1
+		self.completed += 1
+		return result
+
+	async def hash(self, password: str) -> bytes:
+		return await self._run(hash_password, password, self.rounds)
+
+	async def verify(self, password: str, hashed_password: bytes) -> bool:
+		return await self._run(validate_password, password, hashed_password)
+
+	def metrics(self) -> dict:
+		return {
+			'queue_depth': self.queue_depth,
+			'max_workers': self.max_workers,
+			'max_queue': self.max_queue,
+			'completed': self.completed,
+			'rejected': self.rejected,
+		}
+
+	def shutdown(self) -> None:
+		'''Releases the pool without waiting: hashes already submitted still finish in its threads'''
+		executor, self._executor = self._executor, None
+		if executor is not None:
+			executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher()
@@ -14,8 +14,13 @@ async def get_redis(request: Request) -> Redis:
 def get_uow() -> UnitOfWork:
 	return UnitOfWork()
 
+def get_read_uow() -> UnitOfWork:
+	return UnitOfWork(readonly=True)
+
 UoWDep = Annotated[IUnitOfWork, Depends(get_uow)]
 
+ReadUoWDep = Annotated[IUnitOfWork, Depends(get_read_uow)]
+
 RedisDep = Annotated[Redis, Depends(get_redis)]
 
 S3Dep = Annotated[S3Repository, Depends(get_s3_repository)]
\ No newline at end of file
@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, EmailStr, model_validator
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, RootModel, model_validator
 
 '''User schemas'''
 
@@ -101,4 +101,26 @@ class UserResponseDto(BaseModel):
 	id: int
 	username: str
 	email: EmailStr
-	active: bool
\ No newline at end of file
+	active: bool
+
+	class Config:
+		from_attributes = True
+
+class UserListDto(RootModel[List[UserResponseDto]]):
+	'''
+	User list built with model_construct from trusted database rows (see to_user_dtos),
+	without validation; serialized by pydantic in one call when returned from an endpoint
+	'''
+
+	def __iter__(self):
+		return iter(self.root)
+
+	def __len__(self) -> int:
+		return len(self.root)
+
+	def __getitem__(self, index):
+		return self.root[index]
+
+class UserPageDto(BaseModel):
+	items: List[UserResponseDto]
+	next_cursor: Optional[str] = None
\ No newline at end of file
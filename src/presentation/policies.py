@@ -0,0 +1,110 @@
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute
+
+
+POLICY_ATTRIBUTE = '__auth_policy__'
+
+F = TypeVar('F', bound=Callable)
+
+
+class Policy(str, Enum):
+	PUBLIC = 'public'
+	ADMIN = 'admin'
+	UNAUTHENTICATED_ONLY = 'unauthenticated_only'
+	AUTHENTICATED_ONLY = 'authenticated_only'
+	# any valid (or refreshable) token, the default for unannotated routes
+	AUTHENTICATED = 'authenticated'
+
+
+def auth_policy(policy: Policy) -> Callable[[F], F]:
+	'''Marks an endpoint with the auth policy the middleware applies to its path'''
+	def decorator(endpoint: F) -> F:
+		setattr(endpoint, POLICY_ATTRIBUTE, policy)
+		return endpoint
+	return decorator
+
+
+def _segments(path: str) -> List[str]:
+	return [segment for segment in path.split('/') if segment]
+
+
+class _Node:
+	__slots__ = ('static', 'param', 'catch_all', 'policy')
+
+	def __init__(self):
+		self.static: Dict[str, _Node] = {}
+		self.param: Optional[_Node] = None
+		self.catch_all: Optional[Policy] = None
+		self.policy: Optional[Policy] = None
+
+
+class RoutePolicyTable:
+	'''
+	Segment trie over route templates. Static segments win over `{param}` ones,
+	`{name:path}` swallows the rest of the path; lookups walk the path once and
+	only backtrack when a static branch dead-ends.
+	'''
+
+	def __init__(self, default: Policy = Policy.AUTHENTICATED):
+		self.default = default
+		self._root = _Node()
+
+	def add(self, template: str, policy: Policy) -> None:
+		node = self._root
+		for segment in _segments(template):
+			if segment.startswith('{') and segment.endswith('}'):
+				if segment.endswith(':path}'):
+					if node.catch_all not in (None, policy):
+						raise ValueError(f'Conflicting auth policies for {template}: {node.catch_all} and {policy}')
+					node.catch_all = policy
+					return
+				if node.param is None:
+					node.param = _Node()
+				node = node.param
+			else:
+				node = node.static.setdefault(segment, _Node())
+		if node.policy not in (None, policy):
+			raise ValueError(f'Conflicting auth policies for {template}: {node.policy} and {policy}')
+		node.policy = policy
+
+	def lookup(self, path: str) -> Policy:
+		policy = self._match(self._root, _segments(path), 0)
+		return policy if policy is not None else self.default
+
+	def _match(self, node: _Node, segments: List[str], index: int) -> Optional[Policy]:
+		if index == len(segments):
+			return node.policy if node.policy is not None else node.catch_all
+		child = node.static.get(segments[index])
+		if child is not None:
+			policy = self._match(child, segments, index + 1)
+			if policy is not None:
+				return policy
+		if node.param is not None:
+			policy = self._match(node.param, segments, index + 1)
+			if policy is not None:
+				return policy
+		return node.catch_all
+
+
+def compile_route_policies(routes: Iterable[BaseRoute], public_paths: Iterable[str] = ()) -> RoutePolicyTable:
+	table = RoutePolicyTable()
+	for path in public_paths:
+		table.add(path, Policy.PUBLIC)
+	for route in routes:
+		endpoint = getattr(route, 'endpoint', None)
+		policy = getattr(endpoint, POLICY_ATTRIBUTE, None)
+		if policy is not None:
+			table.add(route.path, policy)
+	return table
+
+
+def compile_app_policies(app: FastAPI, public_paths: Iterable[str] = ()) -> RoutePolicyTable:
+	'''Builds the table from every route on the app, with the docs endpoints and public_paths public'''
+	docs_paths = [
+		path for path in (app.openapi_url, app.docs_url, app.redoc_url, app.swagger_ui_oauth2_redirect_url)
+		if path
+	]
+	return compile_route_policies(app.routes, [*docs_paths, *public_paths])
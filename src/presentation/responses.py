@@ -0,0 +1,76 @@
+from functools import wraps
+import inspect
+from typing import Any, Callable, Type
+
+import orjson
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+from starlette.responses import JSONResponse, Response
+
+
+def _default(value: Any) -> Any:
+	# pydantic models nested in plain containers, plus anything orjson has no native support for
+	return to_jsonable_python(value, by_alias=True)
+
+
+class FastJSONResponse(JSONResponse):
+	'''
+	JSON response rendered by orjson. Pydantic models are written by their
+	compiled serializer straight to bytes; datetimes, UUIDs, enums and dataclasses
+	are handled natively by orjson.
+	'''
+
+	def render(self, content: Any) -> bytes:
+		if isinstance(content, BaseModel):
+			return content.__pydantic_serializer__.to_json(content, by_alias=True)
+		return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def direct_response(call: Callable, response_class: Type[Response], status_code: int | None) -> Callable:
+	'''Wraps an endpoint so its plain return value is rendered by response_class as is'''
+	def respond(content: Any) -> Any:
+		if isinstance(content, Response):
+			return content
+		if status_code is None:
+			return response_class(content)
+		return response_class(content, status_code=status_code)
+
+	if inspect.iscoroutinefunction(call):
+		@wraps(call)
+		async def endpoint(*args, **kwargs):
+			return respond(await call(*args, **kwargs))
+	else:
+		@wraps(call)
+		def endpoint(*args, **kwargs):
+			return respond(call(*args, **kwargs))
+	return endpoint
+
+
+class FastJSONRoute(APIRoute):
+	'''
+	Without a response_model FastAPI runs every return value through
+	jsonable_encoder before the response class sees it, which is most of the
+	serialization cost of a large dict or hit list. Endpoints on this route
+	return a FastJSONResponse instead, so the value is serialized once.
+
+	Routes with a response_model (validated and serialized by pydantic), a
+	Response parameter (the endpoint sets cookies, headers or the status on it)
+	or a bodiless status code keep FastAPI's handling.
+	'''
+
+	def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+		super().__init__(path, endpoint, **kwargs)
+		response_class = self.response_class
+		if isinstance(response_class, DefaultPlaceholder):
+			response_class = response_class.value
+		if (
+			self.response_model is None
+			and self.dependant.response_param_name is None
+			and issubclass(response_class, FastJSONResponse)
+			and is_body_allowed_for_status_code(self.status_code)
+		):
+			# the request handler reads dependant.call on every request
+			self.dependant.call = direct_response(self.dependant.call, response_class, self.status_code)
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
-from src.infrastructure.db.db import async_session_maker
-from src.application.repositories.PostgresRepository import UserRepository, LaptopRepository
+from config.settings import Settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.infrastructure.db.db import async_session_maker, replica_router
+from src.infrastructure.db.lazy_session import LazySession
+from src.infrastructure.db.models import UserOrm, LaptopOrm
+from src.application.repositories.PostgresRepository import UserRepository, LaptopRepository, USER_PUBLIC_FIELDS
+from src.utils.loader import BatchLoader
 from src.utils.logger import logger
 from typing import Self
 
@@ -25,30 +30,42 @@ class IUnitOfWork(ABC):
 
 
 class UnitOfWork:
-	def __init__(self):
+	def __init__(self, readonly: bool = False):
+		# read-only units of work are served by replicas, falling back to the primary
+		self.readonly = readonly
 		self._session_factory = async_session_maker
 
+	async def _open_session(self) -> AsyncSession:
+		if self.readonly:
+			return await replica_router.session()
+		return self._session_factory()
+
 	async def commit(self):
+		if not self._session.has_changes:
+			logger.debug("Nothing to commit, skipping COMMIT round-trip")
+			return
 		await self._session.commit()
 
 	async def rollback(self):
 		await self._session.rollback()
 
 	async def __aenter__(self):
-		try:
-			self._session = self._session_factory()
-			self.users = UserRepository(self._session)
-			self.laptops = LaptopRepository(self._session)
-			return self
-		except Exception:
-			await self._session.close()
-			raise
+		# nothing touches the pool here, the session opens on the first statement
+		self._session = LazySession(self._open_session)
+		self.users = UserRepository(self._session, UserOrm, Settings.postgres_bulk_chunk_size)
+		self.laptops = LaptopRepository(self._session, LaptopOrm, Settings.postgres_bulk_chunk_size)
+		# concurrent user lookups within this unit of work share one query; the two
+		# loaders may be awaited together, LazySession runs their batches one at a time
+		self.user_loader = BatchLoader(self.users.get_by_ids)
+		# read-only variant returning projected rows of the public user fields
+		self.user_view_loader = BatchLoader(lambda ids: self.users.get_by_ids(ids, USER_PUBLIC_FIELDS))
+		return self
 
 	async def __aexit__(self, exc_type, exc_value, exc_tb):
 		try:
 			if exc_type is None:
 				await self.commit()
 			else:
-				await self._session.rollback()
+				await self.rollback()
 		finally:
-			await self._session.close()
\ No newline at end of file
+			await self._session.close()
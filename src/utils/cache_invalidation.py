@@ -0,0 +1,47 @@
+from redis.asyncio import Redis
+
+from config.settings import Settings
+from src.utils.logger import logger
+
+
+CACHE_INVALIDATION_CHANNEL = 'cache-invalidation'
+CACHE_GENERATION_PREFIX = 'cache-gen:'
+
+USERS_CACHE_TAG = 'users'
+
+# cache keys embed the generation of every tag they depend on; bumping it
+# orphans the whole family at once (the old entries just expire), then every
+# process is told to drop its in-process copies and memoized generation
+INVALIDATE_TAG_SCRIPT = '''
+redis.call('incr', KEYS[1])
+return redis.call('publish', ARGV[1], ARGV[2])
+'''
+
+
+def cache_generation_key(tag: str) -> str:
+	'''Redis counter holding the current generation of tag'''
+	return f'{CACHE_GENERATION_PREFIX}{tag}'
+
+
+class CacheInvalidator:
+	'''
+	Write side of the two-tier cache in etc/cache.py. Services call invalidate()
+	after committing a change; cached results tagged with the changed data stop
+	being addressable in Redis and are evicted from every worker's in-process cache.
+	'''
+
+	def __init__(self, client: Redis, channel: str = CACHE_INVALIDATION_CHANNEL):
+		self._client = client
+		self._channel = channel
+		self._script = client.register_script(INVALIDATE_TAG_SCRIPT)
+
+	async def invalidate(self, *tags: str) -> None:
+		for tag in tags:
+			try:
+				await self._script(keys=[cache_generation_key(tag)], args=[self._channel, tag])
+			except Exception as e:
+				# the change is committed already; stale entries still expire with their TTL
+				logger.error(f"Cache invalidation of tag {tag} failed: {e}")
+
+
+cache_invalidator = CacheInvalidator(Redis.from_url(Settings.redis_url))
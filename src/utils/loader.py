@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from src.utils.logger import logger
+
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class BatchLoader(Generic[K, V]):
+	'''
+	DataLoader-style coalescer: every `load` issued in the same event loop tick
+	is collected and resolved with a single `batch_fn` call. Resolved keys stay
+	memoized for the lifetime of the loader, so it is meant to be request scoped.
+
+	`batch_fn` receives unique keys and may return rows in any order;
+	`key_fn` maps a row back to its key. Missing keys resolve to None.
+	'''
+
+	def __init__(
+		self,
+		batch_fn: Callable[[List[K]], Awaitable[Iterable[V]]],
+		key_fn: Callable[[V], K] = lambda row: row.id,
+		max_batch_size: int = 1000
+	):
+		self._batch_fn = batch_fn
+		self._key_fn = key_fn
+		self._max_batch_size = max_batch_size
+		self._cache: Dict[K, asyncio.Future] = {}
+		# the futures are captured with their keys, so clear() during a batch
+		# neither strands the awaiters nor lets them resolve a newer future
+		self._pending: List[Tuple[K, asyncio.Future]] = []
+		self._batches: Set[asyncio.Task] = set()
+		self._dispatch_scheduled = False
+		# one batch in flight per loader; loaders sharing a session rely on the
+		# session proxy (LazySession) to serialize statements across loaders
+		self._lock = asyncio.Lock()
+
+	async def load(self, key: K) -> Optional[V]:
+		future = self._cache.get(key)
+		if future is None:
+			loop = asyncio.get_running_loop()
+			future = loop.create_future()
+			self._cache[key] = future
+			self._pending.append((key, future))
+			if not self._dispatch_scheduled:
+				self._dispatch_scheduled = True
+				loop.call_soon(self._dispatch)
+		return await future
+
+	async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+		return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+	def prime(self, key: K, value: V) -> None:
+		if key not in self._cache:
+			future = asyncio.get_running_loop().create_future()
+			future.set_result(value)
+			self._cache[key] = future
+
+	def clear(self, key: Optional[K] = None) -> None:
+		if key is None:
+			self._cache.clear()
+		else:
+			self._cache.pop(key, None)
+
+	def _dispatch(self) -> None:
+		self._dispatch_scheduled = False
+		pending, self._pending = self._pending, []
+		for start in range(0, len(pending), self._max_batch_size):
+			# referenced until done, the event loop only keeps weak references to tasks
+			task = asyncio.ensure_future(self._run_batch(pending[start:start + self._max_batch_size]))
+			self._batches.add(task)
+			task.add_done_callback(self._batches.discard)
+
+	async def _run_batch(self, pending: List[Tuple[K, asyncio.Future]]) -> None:
+		keys = [key for key, _ in pending]
+		try:
+			async with self._lock:
+				rows = await self._batch_fn(keys)
+		except Exception as e:
+			logger.error(f"Batch load of {len(keys)} keys failed: {e}")
+			for key, future in pending:
+				# not memoized, the next load retries
+				if self._cache.get(key) is future:
+					del self._cache[key]
+				if not future.done():
+					future.set_exception(e)
+			return
+
+		found: Dict[Any, V] = {self._key_fn(row): row for row in rows}
+		logger.debug(f"Batch loaded {len(found)} of {len(keys)} keys in one query")
+		for key, future in pending:
+			if not future.done():
+				future.set_result(found.get(key))
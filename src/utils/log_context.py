@@ -0,0 +1,56 @@
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Any, Dict
+import logging
+
+import orjson
+
+
+_log_context: ContextVar[Dict[str, Any]] = ContextVar('log_context', default={})
+
+# attributes every LogRecord has; anything else on a record came from extra= or the bound context
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def bind_log_context(**fields: Any) -> Token:
+	'''Adds fields (request_id, user_id, route...) to every record logged from the current task'''
+	return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token: Token) -> None:
+	_log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+	'''
+	Copies the bound context onto records. Context variables are only visible on
+	the thread that logs, so this has to run before records are queued.
+	'''
+
+	def filter(self, record: logging.LogRecord) -> bool:
+		for key, value in _log_context.get().items():
+			if not hasattr(record, key):
+				setattr(record, key, value)
+		return True
+
+
+class JsonFormatter(logging.Formatter):
+	'''One JSON object per record, for newline-delimited output to files and Logstash'''
+
+	def format(self, record: logging.LogRecord) -> str:
+		document = {
+			'@timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+			'level': record.levelname,
+			'logger': record.name,
+			'message': record.getMessage(),
+			'source': f'{record.filename}:{record.lineno}',
+		}
+		if record.exc_info and not record.exc_text:
+			record.exc_text = self.formatException(record.exc_info)
+		# records from the queue carry the traceback only as exc_text
+		if record.exc_text:
+			document['exception'] = record.exc_text
+		for key, value in vars(record).items():
+			if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+				document[key] = value
+		return orjson.dumps(document, default=str).decode()
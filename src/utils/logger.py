@@ -1,16 +1,198 @@
-from config.settings import BASE_DIR
+from config.settings import BASE_DIR, Settings
 from yaml import safe_load
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+import atexit
+import copy
 import logging
+import queue
+
+from src.utils.log_context import ContextFilter, JsonFormatter
+from src.utils.logstash import DiskBuffer, LogstashHandler, LogstashSender
 
 config_file_path = BASE_DIR / 'logging.yaml'
 
 
 with open(config_file_path, 'r', encoding='utf-8') as f:
 	log_config_dict = safe_load(f)
-   
-    
+
+
 dictConfig(log_config_dict)
 
+
+_traceback_formatter = logging.Formatter()
+
+
+class QueuePolicy(str, Enum):
+	# a full queue loses the record, the caller (usually the event loop) never waits
+	DROP = 'drop'
+	# a full queue makes the caller wait up to block_timeout for room, then drops
+	BLOCK = 'block'
+
+
+class BoundedQueueHandler(QueueHandler):
+	'''
+	Front end of a logger: puts records on a bounded queue for a QueueListener
+	thread, which does the file and console I/O (and rotation). Records at or
+	above keep_level always wait for room, so a flood of debug output can not
+	crowd out warnings and errors.
+	'''
+
+	def __init__(
+		self,
+		log_queue: queue.Queue,
+		policy: QueuePolicy | str = QueuePolicy.DROP,
+		block_timeout: float = 0.1,
+		keep_level: int = logging.WARNING
+	):
+		super().__init__(log_queue)
+		self.policy = QueuePolicy(policy)
+		self.block_timeout = block_timeout
+		self.keep_level = keep_level
+		self.enqueued = 0
+		self.dropped = 0
+
+	def enqueue(self, record: logging.LogRecord) -> None:
+		# runs under the handler lock, the counters need no extra locking
+		try:
+			if self.policy is QueuePolicy.BLOCK or record.levelno >= self.keep_level:
+				self.queue.put(record, timeout=self.block_timeout)
+			else:
+				self.queue.put_nowait(record)
+			self.enqueued += 1
+		except queue.Full:
+			self.dropped += 1
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		'''
+		QueueHandler.prepare() folds the traceback into msg for handlers in other
+		processes. Ours share the process and format records themselves, so only
+		the args are merged now (they may change once the call returns) and the
+		traceback travels as exc_text, which JsonFormatter emits as its own field.
+		'''
+		record = copy.copy(record)
+		record.msg = record.getMessage()
+		record.args = None
+		if record.exc_info:
+			if not record.exc_text:
+				record.exc_text = _traceback_formatter.formatException(record.exc_info)
+			# the traceback's frames are not kept alive while the record waits in the queue
+			record.exc_info = None
+		return record
+
+	def metrics(self) -> Dict[str, int | str]:
+		return {
+			'policy': self.policy.value,
+			'enqueued': self.enqueued,
+			'dropped': self.dropped,
+			'queued': self.queue.qsize(),
+			'max_queued': self.queue.maxsize,
+		}
+
+
+class DrainingQueueListener(QueueListener):
+	'''QueueListener whose stop() waits for room on a full queue instead of raising queue.Full'''
+
+	def enqueue_sentinel(self) -> None:
+		self.queue.put(self._sentinel)
+
+
+_pipelines: Dict[str, Tuple[BoundedQueueHandler, DrainingQueueListener, List[logging.Handler]]] = {}
+
+
+def install_queue_logging(
+	*names: str,
+	maxsize: int = Settings.log_queue_size,
+	policy: QueuePolicy | str = Settings.log_queue_policy,
+	block_timeout: float = Settings.log_queue_block_timeout
+) -> None:
+	'''
+	Moves the handlers configured in logging.yaml for each named logger behind a
+	BoundedQueueHandler, with a listener thread per logger driving them.
+	'''
+	for name in names:
+		target = logging.getLogger(name)
+		handlers = list(target.handlers)
+		if name in _pipelines or not handlers:
+			continue
+		front = BoundedQueueHandler(queue.Queue(maxsize), policy, block_timeout)
+		front.addFilter(ContextFilter())
+		listener = DrainingQueueListener(front.queue, *handlers, respect_handler_level=True)
+		for handler in handlers:
+			target.removeHandler(handler)
+		target.addHandler(front)
+		listener.start()
+		_pipelines[name] = (front, listener, handlers)
+
+
+def shutdown_logging(*names: str) -> None:
+	'''
+	Drains the queues of the named loggers (all of them by default) into their
+	handlers and flushes them, then puts the handlers back on their loggers so
+	anything logged later is still written and install_queue_logging can run again.
+	'''
+	for name in names or list(_pipelines):
+		if name not in _pipelines:
+			continue
+		front, listener, handlers = _pipelines[name]
+		listener.stop()
+		target = logging.getLogger(name)
+		target.removeHandler(front)
+		for handler in handlers:
+			try:
+				handler.flush()
+			except (OSError, ValueError):
+				# stream already closed at interpreter exit, as logging.shutdown tolerates
+				pass
+			target.addHandler(handler)
+		del _pipelines[name]
+
+
+logstash_handler: Optional[LogstashHandler] = None
+json_file_handler: Optional[logging.Handler] = None
+
+
+def configure_structured_logging(*names: str) -> None:
+	'''
+	With log_format "json" the named loggers also write newline-delimited JSON to
+	log_json_file; with logstash_enabled they also ship every record to the
+	Logstash TCP input. Both get handlers of their own, the text handlers from
+	logging.yaml (console is shared with the root logger) keep their format.
+	'''
+	global logstash_handler, json_file_handler
+	if Settings.logstash_enabled and logstash_handler is None:
+		sender = LogstashSender(
+			Settings.logstash_host,
+			Settings.logstash_port,
+			buffer=DiskBuffer(BASE_DIR / Settings.logstash_buffer_path, Settings.logstash_buffer_max_bytes),
+			batch_size=Settings.logstash_batch_size,
+			flush_interval=Settings.logstash_flush_interval
+		)
+		logstash_handler = LogstashHandler(sender)
+	if Settings.log_format == 'json' and json_file_handler is None:
+		json_file_handler = RotatingFileHandler(
+			BASE_DIR / Settings.log_json_file, maxBytes=10485760, backupCount=5, encoding='utf-8'
+		)
+		json_file_handler.setFormatter(JsonFormatter())
+	for name in names:
+		target = logging.getLogger(name)
+		for handler in (json_file_handler, logstash_handler):
+			if handler is not None and handler not in target.handlers:
+				target.addHandler(handler)
+
+
+def logging_metrics() -> Dict[str, Any]:
+	return {
+		'queues': {name: front.metrics() for name, (front, _, _) in _pipelines.items()},
+		'logstash': logstash_handler.sender.metrics() if logstash_handler else None,
+	}
+
+
+configure_structured_logging('logger')
+install_queue_logging('logger', 'test_logger')
+atexit.register(shutdown_logging)
+
 logger = logging.getLogger("logger")
-test_logger = logging.getLogger("test_logger")
\ No newline at end of file
+test_logger = logging.getLogger("test_logger")
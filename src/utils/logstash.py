@@ -0,0 +1,237 @@
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from src.utils.log_context import JsonFormatter
+
+
+# the sender's own problems go to the root console handler, never back into the sender
+_log = logging.getLogger(__name__)
+
+
+class DiskBuffer:
+	'''
+	NDJSON spill file for lines Logstash could not take. Replayed ahead of new
+	lines once the endpoint is back; lines past max_bytes are dropped.
+	'''
+
+	def __init__(self, path: str | Path, max_bytes: int = 32 * 1024 * 1024):
+		self.path = Path(path)
+		self.max_bytes = max_bytes
+		self.dropped = 0
+
+	@property
+	def size(self) -> int:
+		try:
+			return self.path.stat().st_size
+		except FileNotFoundError:
+			return 0
+
+	def append(self, lines: List[bytes]) -> None:
+		data = b''.join(lines)
+		if self.size + len(data) > self.max_bytes:
+			self.dropped += len(lines)
+			return
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		with open(self.path, 'ab') as f:
+			f.write(data)
+
+	def read(self) -> bytes:
+		try:
+			return self.path.read_bytes()
+		except FileNotFoundError:
+			return b''
+
+	def clear(self) -> None:
+		self.path.unlink(missing_ok=True)
+
+
+class LogstashSender:
+	'''
+	Ships newline-delimited lines to the Logstash TCP input in batches. submit()
+	is thread-safe and never blocks; run() is the sender loop. A batch is written
+	when batch_size lines are pending or every flush_interval seconds. While the
+	endpoint is unreachable, batches go to the disk buffer and reconnects back off
+	exponentially up to backoff_max. Delivery is at least once: a connection that
+	drops right after a write can cause Logstash to receive a replayed line twice.
+	'''
+
+	def __init__(
+		self,
+		host: str,
+		port: int,
+		buffer: Optional[DiskBuffer] = None,
+		batch_size: int = 500,
+		flush_interval: float = 1.0,
+		max_pending: int = 50_000,
+		timeout: float = 5.0,
+		backoff_initial: float = 0.5,
+		backoff_max: float = 30.0
+	):
+		self.host = host
+		self.port = port
+		self.buffer = buffer
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self.max_pending = max_pending
+		self.timeout = timeout
+		self.backoff_initial = backoff_initial
+		self.backoff_max = backoff_max
+
+		self._pending: Deque[bytes] = deque()
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._wakeup: Optional[asyncio.Event] = None
+		self._reader: Optional[asyncio.StreamReader] = None
+		self._writer: Optional[asyncio.StreamWriter] = None
+		self._retry_at = 0.0
+		self._backoff = backoff_initial
+		self._closing = False
+
+		self.sent = 0
+		self.spilled = 0
+		self.dropped = 0
+		self.connects = 0
+
+	def submit(self, line: bytes) -> None:
+		if len(self._pending) >= self.max_pending:
+			self.dropped += 1
+			return
+		self._pending.append(line)
+		if len(self._pending) >= self.batch_size:
+			self._wake()
+
+	def stop(self) -> None:
+		'''Makes run() send (or spill) what is pending and return'''
+		self._closing = True
+		self._wake()
+
+	def _wake(self) -> None:
+		if self._loop is None:
+			return
+		try:
+			self._loop.call_soon_threadsafe(self._wakeup.set)
+		except RuntimeError:
+			# loop already closed
+			pass
+
+	async def run(self) -> None:
+		self._wakeup = asyncio.Event()
+		self._loop = asyncio.get_running_loop()
+		try:
+			while not self._closing:
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+				except asyncio.TimeoutError:
+					pass
+				self._wakeup.clear()
+				await self.flush()
+		finally:
+			await self.flush()
+			await self._disconnect()
+
+	async def flush(self) -> None:
+		while self._pending:
+			batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+			if await self._deliver(batch):
+				continue
+			if self.buffer is None:
+				self.dropped += len(batch)
+			else:
+				self.buffer.append(batch)
+				self.spilled += len(batch)
+
+	async def _deliver(self, batch: List[bytes]) -> bool:
+		if not await self._connect():
+			return False
+		backlog = self.buffer.read() if self.buffer else b''
+		try:
+			self._writer.write(backlog + b''.join(batch))
+			await asyncio.wait_for(self._writer.drain(), self.timeout)
+		except (OSError, asyncio.TimeoutError) as e:
+			_log.warning(f'Logstash {self.host}:{self.port} write failed: {e}')
+			await self._disconnect()
+			self._schedule_retry()
+			return False
+		if backlog:
+			self.buffer.clear()
+		self.sent += len(batch)
+		return True
+
+	async def _connect(self) -> bool:
+		if self._writer is not None:
+			if not self._reader.at_eof():
+				return True
+			# Logstash closed the connection (restart, idle timeout)
+			await self._disconnect()
+		if time.monotonic() < self._retry_at:
+			return False
+		try:
+			self._reader, self._writer = await asyncio.wait_for(
+				asyncio.open_connection(self.host, self.port),
+				self.timeout
+			)
+		except (OSError, asyncio.TimeoutError) as e:
+			_log.warning(f'Logstash {self.host}:{self.port} unreachable, retrying in {self._backoff:.1f}s: {e}')
+			self._schedule_retry()
+			return False
+		self.connects += 1
+		self._backoff = self.backoff_initial
+		return True
+
+	async def _disconnect(self) -> None:
+		writer, self._reader, self._writer = self._writer, None, None
+		if writer is None:
+			return
+		writer.close()
+		try:
+			await writer.wait_closed()
+		except OSError:
+			pass
+
+	def _schedule_retry(self) -> None:
+		self._retry_at = time.monotonic() + self._backoff
+		self._backoff = min(self._backoff * 2, self.backoff_max)
+
+	def metrics(self) -> Dict[str, int | bool]:
+		return {
+			'connected': self._writer is not None,
+			'pending': len(self._pending),
+			'sent': self.sent,
+			'spilled': self.spilled,
+			'dropped': self.dropped + (self.buffer.dropped if self.buffer else 0),
+			'buffered_bytes': self.buffer.size if self.buffer else 0,
+			'connects': self.connects,
+		}
+
+
+class LogstashHandler(logging.Handler):
+	'''
+	Formats records as JSON lines for a LogstashSender, which runs on its own
+	thread and event loop so it keeps shipping regardless of what the app loop does.
+	'''
+
+	def __init__(self, sender: LogstashSender, level: int = logging.NOTSET, join_timeout: float = 10.0):
+		super().__init__(level)
+		self.sender = sender
+		self.join_timeout = join_timeout
+		self.setFormatter(JsonFormatter())
+		self._thread = threading.Thread(target=self._run_sender, name='logstash-sender', daemon=True)
+		self._thread.start()
+
+	def _run_sender(self) -> None:
+		asyncio.run(self.sender.run())
+
+	def emit(self, record: logging.LogRecord) -> None:
+		try:
+			self.sender.submit(self.format(record).encode() + b'\n')
+		except Exception:
+			self.handleError(record)
+
+	def close(self) -> None:
+		self.sender.stop()
+		self._thread.join(self.join_timeout)
+		super().close()
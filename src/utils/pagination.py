@@ -0,0 +1,27 @@
+import base64
+import binascii
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+CURSOR_PREFIX = 'id:'
+
+
+def encode_cursor(last_id: int) -> str:
+	raw = f'{CURSOR_PREFIX}{last_id}'.encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+	'''Returns the last seen id encoded in cursor, None for the first page'''
+	if not cursor:
+		return None
+	try:
+		padded = cursor + '=' * (-len(cursor) % 4)
+		raw = base64.urlsafe_b64decode(padded.encode()).decode()
+		if not raw.startswith(CURSOR_PREFIX):
+			raise ValueError(raw)
+		return int(raw.removeprefix(CURSOR_PREFIX))
+	except (binascii.Error, UnicodeDecodeError, ValueError):
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid pagination cursor')
@@ -0,0 +1,43 @@
+from enum import Enum
+
+from sqlalchemy import ColumnElement, Integer
+
+
+LIKE_ESCAPE = '\\'
+
+
+class SearchMode(str, Enum):
+	# B-tree equality
+	EXACT = 'exact'
+	# case-insensitive ILIKE 'query%', served by the pg_trgm GIN index
+	PREFIX = 'prefix'
+	# pg_trgm similarity (`%` operator, pg_trgm.similarity_threshold), same GIN index
+	FUZZY = 'fuzzy'
+
+
+def escape_like(value: str) -> str:
+	return (
+		value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+		.replace('%', LIKE_ESCAPE + '%')
+		.replace('_', LIKE_ESCAPE + '_')
+	)
+
+
+def search_clause(column, query: str | int, mode: SearchMode | str = SearchMode.EXACT) -> ColumnElement[bool]:
+	'''
+	WHERE clause matching column against query in the given mode. Every mode is
+	written so Postgres can answer it from an index; integer columns only support
+	exact matches. Raises ValueError for an unsupported mode or query.
+	'''
+	mode = SearchMode(mode)
+	if isinstance(column.type, Integer):
+		if mode is not SearchMode.EXACT:
+			raise ValueError(f'{column.key} only supports exact search')
+		return column == int(query)
+
+	query = str(query)
+	if mode is SearchMode.EXACT:
+		return column == query
+	if mode is SearchMode.PREFIX:
+		return column.ilike(escape_like(query) + '%', escape=LIKE_ESCAPE)
+	return column.bool_op('%')(query)
@@ -0,0 +1,128 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import String, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from config.settings import TestSettings
+from src.application.repositories.PostgresRepository import BulkUpsertMixin, _dedupe
+
+
+class TagBase(DeclarativeBase):
+    pass
+
+
+class TagOrm(TagBase):
+    __tablename__ = 'bulk_write_tags'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(50), unique=True)
+    color: Mapped[str | None]
+
+
+class TagRepository(BulkUpsertMixin):
+    conflict_on = ('name',)
+
+    def __init__(self, session: AsyncSession, bulk_chunk_size: int = 2):
+        self._session = session
+        self.model = TagOrm
+        self.bulk_chunk_size = bulk_chunk_size
+        self.statements = 0
+
+        execute = session.execute
+
+        async def counting_execute(*args, **kwargs):
+            self.statements += 1
+            return await execute(*args, **kwargs)
+
+        session.execute = counting_execute
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine(TestSettings.test_async_pg_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(TagBase.metadata.drop_all)
+            await conn.run_sync(TagBase.metadata.create_all)
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f'needs a live Postgres at the .env.test address: {e}')
+    async with AsyncSession(engine) as session:
+        yield session
+    async with engine.begin() as conn:
+        await conn.run_sync(TagBase.metadata.drop_all)
+    await engine.dispose()
+
+
+async def names_by_id(session: AsyncSession) -> dict:
+    result = await session.execute(select(TagOrm.id, TagOrm.name, TagOrm.color).order_by(TagOrm.id))
+    return {row.id: (row.name, row.color) for row in result}
+
+
+def test_dedupe_keeps_last_row_at_first_position():
+    rows = [{'name': 'a', 'color': 'red'}, {'name': 'b'}, {'name': 'a', 'color': 'blue'}]
+    assert _dedupe(rows, ['name']) == [{'name': 'a', 'color': 'blue'}, {'name': 'b'}]
+
+
+@pytest.mark.asyncio
+async def test_add_many_inserts_in_chunks(session):
+    repo = TagRepository(session)
+    ids = await repo.add_many([{'name': f'tag-{n}', 'color': None} for n in range(5)])
+
+    assert repo.statements == 3
+    assert len(set(ids)) == 5
+    assert [name for name, _ in (await names_by_id(session)).values()] == [f'tag-{n}' for n in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_add_many_can_skip_conflicts(session):
+    repo = TagRepository(session)
+    first, = await repo.add_many([{'name': 'a', 'color': None}])
+    ids = await repo.add_many([{'name': 'a', 'color': 'red'}, {'name': 'b', 'color': None}], skip_conflicts=True)
+
+    assert len(ids) == 1 and first not in ids
+    assert (await names_by_id(session))[first] == ('a', None)
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_updates_and_dedupes_within_a_chunk(session):
+    repo = TagRepository(session, bulk_chunk_size=10)
+    existing, = await repo.add_many([{'name': 'a', 'color': None}])
+
+    ids = await repo.upsert_many([
+        {'name': 'a', 'color': 'red'},
+        {'name': 'b', 'color': 'green'},
+        {'name': 'a', 'color': 'blue'},
+    ])
+
+    assert ids[0] == existing and len(ids) == 2
+    stored = await names_by_id(session)
+    assert stored[existing] == ('a', 'blue')
+    assert stored[ids[1]] == ('b', 'green')
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_without_update_columns_returns_existing_ids(session):
+    repo = TagRepository(session)
+    existing, = await repo.add_many([{'name': 'a', 'color': None}])
+
+    ids = await repo.upsert_many([{'name': 'new'}, {'name': 'a'}])
+
+    assert len(ids) == 2 and ids[1] == existing
+    assert (await names_by_id(session))[ids[0]] == ('new', None)
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_dedupes_across_chunks(session):
+    repo = TagRepository(session, bulk_chunk_size=2)
+
+    ids = await repo.upsert_many([
+        {'name': 'a', 'color': 'red'},
+        {'name': 'b', 'color': 'green'},
+        {'name': 'a', 'color': 'blue'},
+    ])
+
+    assert len(ids) == 2 and repo.statements == 1
+    assert (await names_by_id(session))[ids[0]] == ('a', 'blue')
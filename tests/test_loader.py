@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from src.utils.loader import BatchLoader
+
+
+def make_loader():
+    calls = []
+
+    async def batch_fn(ids):
+        calls.append(list(ids))
+        return [SimpleNamespace(id=i) for i in ids if i != 404]
+
+    return BatchLoader(batch_fn), calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_coalesce_into_one_batch():
+    loader, calls = make_loader()
+    users = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(404))
+    assert [u.id if u else None for u in users] == [1, 2, 1, None]
+    assert calls == [[1, 2, 404]]
+
+
+@pytest.mark.asyncio
+async def test_loaded_ids_are_served_from_memory():
+    loader, calls = make_loader()
+    first = await loader.load(7)
+    second = await loader.load(7)
+    assert first is second
+    assert calls == [[7]]
+
+    loader.clear(7)
+    await loader.load(7)
+    assert calls == [[7], [7]]
+
+
+@pytest.mark.asyncio
+async def test_clear_during_a_batch_resolves_its_awaiters_and_reloads():
+    started, release = asyncio.Event(), asyncio.Event()
+    calls = []
+
+    async def batch_fn(ids):
+        calls.append(list(ids))
+        if len(calls) == 1:
+            started.set()
+            await release.wait()
+            return [SimpleNamespace(id=i, version=1) for i in ids]
+        return [SimpleNamespace(id=i, version=2) for i in ids]
+
+    loader = BatchLoader(batch_fn)
+    first = asyncio.ensure_future(loader.load(1))
+    await started.wait()
+    loader.clear()
+    second = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert (await asyncio.wait_for(first, 1)).version == 1
+    assert (await asyncio.wait_for(second, 1)).version == 2
+    assert calls == [[1], [1]]
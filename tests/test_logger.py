@@ -0,0 +1,88 @@
+import io
+import logging
+import queue
+
+import orjson
+
+from src.utils.log_context import JsonFormatter
+from src.utils.logger import BoundedQueueHandler, DrainingQueueListener, QueuePolicy, install_queue_logging, shutdown_logging
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def make_logger(name: str, front: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(name)
+    log.handlers = [front]
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    return log
+
+
+def test_full_queue_drops_without_blocking():
+    front = BoundedQueueHandler(queue.Queue(2), QueuePolicy.DROP, block_timeout=0.01)
+    log = make_logger('test_queue_drop', front)
+    for n in range(5):
+        log.info('line %d', n)
+    # warnings wait for room first, then are dropped too when nothing drains
+    log.warning('kept if possible')
+
+    assert front.metrics() == {'policy': 'drop', 'enqueued': 2, 'dropped': 4, 'queued': 2, 'max_queued': 2}
+
+
+def test_stop_drains_a_full_queue():
+    recorder = RecordingHandler()
+    front = BoundedQueueHandler(queue.Queue(3), QueuePolicy.BLOCK)
+    log = make_logger('test_queue_drain', front)
+    for n in range(3):
+        log.info('line %d', n)
+
+    listener = DrainingQueueListener(front.queue, recorder)
+    listener.start()
+    listener.stop()
+
+    assert recorder.messages == ['line 0', 'line 1', 'line 2']
+    assert front.queue.empty()
+
+
+def test_pipeline_is_reinstalled_after_shutdown():
+    recorder = RecordingHandler()
+    log = make_logger('test_queue_reinstall', recorder)
+
+    install_queue_logging('test_queue_reinstall')
+    shutdown_logging('test_queue_reinstall')
+    assert log.handlers == [recorder]
+
+    install_queue_logging('test_queue_reinstall')
+    front, = log.handlers
+    assert isinstance(front, BoundedQueueHandler)
+    log.info('after restart')
+    shutdown_logging('test_queue_reinstall')
+
+    assert recorder.messages == ['after restart']
+    assert log.handlers == [recorder]
+
+
+def test_queued_records_keep_the_traceback_apart_from_the_message():
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(JsonFormatter())
+    log = make_logger('test_queue_exception', handler)
+
+    install_queue_logging('test_queue_exception')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        log.exception('failed for user %d', 7)
+    shutdown_logging('test_queue_exception')
+
+    document = orjson.loads(output.getvalue())
+    assert document['message'] == 'failed for user 7'
+    assert document['exception'].startswith('Traceback')
+    assert 'ValueError: boom' in document['exception']
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+
+import orjson
+import pytest
+
+from src.utils.log_context import ContextFilter, JsonFormatter, bind_log_context, reset_log_context
+from src.utils.logstash import DiskBuffer, LogstashSender
+
+
+class LogstashStandIn:
+    '''Local TCP server in place of the Logstash tcp input, collects received lines'''
+
+    def __init__(self):
+        self.lines = []
+        self.server = None
+
+    async def start(self, port: int = 0) -> int:
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        while line := await reader.readline():
+            self.lines.append(line)
+        writer.close()
+
+    async def wait_for(self, count: int):
+        for _ in range(200):
+            if len(self.lines) >= count:
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError(f'received {len(self.lines)} of {count} lines')
+
+
+@pytest.mark.asyncio
+async def test_batches_are_shipped_as_lines():
+    standin = LogstashStandIn()
+    port = await standin.start()
+    sender = LogstashSender('127.0.0.1', port, batch_size=2, flush_interval=0.05)
+    task = asyncio.create_task(sender.run())
+
+    for n in range(3):
+        sender.submit(b'{"n": %d}\n' % n)
+    await standin.wait_for(3)
+    sender.stop()
+    await task
+    await standin.stop()
+
+    assert standin.lines == [b'{"n": 0}\n', b'{"n": 1}\n', b'{"n": 2}\n']
+    assert sender.metrics()['sent'] == 3
+
+
+@pytest.mark.asyncio
+async def test_unreachable_endpoint_spills_to_disk_and_replays(tmp_path):
+    standin = LogstashStandIn()
+    port = await standin.start()
+    await standin.stop()
+
+    buffer = DiskBuffer(tmp_path / 'logstash-buffer.ndjson')
+    sender = LogstashSender('127.0.0.1', port, buffer=buffer, backoff_initial=0)
+    sender.submit(b'first\n')
+    sender.submit(b'second\n')
+    await sender.flush()
+    assert buffer.read() == b'first\nsecond\n'
+    assert sender.metrics()['spilled'] == 2
+
+    await standin.start(port)
+    sender.submit(b'third\n')
+    await sender.flush()
+    await standin.wait_for(3)
+    await sender._disconnect()
+    await standin.stop()
+
+    # the backlog goes out ahead of newer lines
+    assert standin.lines == [b'first\n', b'second\n', b'third\n']
+    assert buffer.size == 0
+
+
+def test_json_records_carry_request_context():
+    log = logging.getLogger('test_json_records')
+    record = log.makeRecord(log.name, logging.INFO, __file__, 1, 'GET /users %d', (200,), None, extra={'latency_ms': 1.5})
+    token = bind_log_context(request_id='abc', user_id=7, route='/users')
+    try:
+        ContextFilter().filter(record)
+    finally:
+        reset_log_context(token)
+
+    document = orjson.loads(JsonFormatter().format(record))
+    assert document['message'] == 'GET /users 200'
+    assert document['level'] == 'INFO'
+    assert {key: document[key] for key in ('request_id', 'user_id', 'route', 'latency_ms')} == {
+        'request_id': 'abc', 'user_id': 7, 'route': '/users', 'latency_ms': 1.5
+    }
@@ -0,0 +1,20 @@
+import pytest
+from fastapi import HTTPException
+from src.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    for last_id in (1, 42, 10_000_000):
+        assert decode_cursor(encode_cursor(last_id)) == last_id
+
+
+def test_first_page_has_no_cursor():
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor(1)[:-1] + '!', 'aWQ6YWJj'])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.presentation.api.auth_service.utils import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_calls_past_the_queue_cap_are_rejected_with_503():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=1)
+    release = threading.Event()
+    running = asyncio.ensure_future(hasher._run(release.wait))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(HTTPException) as error:
+        await hasher.hash('password')
+    release.set()
+    await running
+
+    assert error.value.status_code == 503
+    assert hasher.metrics()['rejected'] == 1
+    assert hasher.metrics()['completed'] == 1
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hasher_works_again_after_shutdown():
+    hasher = PasswordHasher(rounds=4)
+    hashed = await hasher.hash('password')
+    hasher.shutdown()
+
+    assert await hasher.verify('password', hashed)
+    assert hasher.metrics()['completed'] == 2
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_calls_are_not_counted_as_completed():
+    hasher = PasswordHasher(rounds=4)
+    with pytest.raises(ValueError):
+        await hasher.verify('password', b'not a bcrypt hash')
+
+    assert hasher.metrics()['completed'] == 0
+    assert hasher.metrics()['queue_depth'] == 0
+    hasher.shutdown()
@@ -0,0 +1,60 @@
+import pytest
+from fastapi import APIRouter, FastAPI
+from src.presentation.policies import Policy, RoutePolicyTable, auth_policy, compile_app_policies
+
+
+def test_templated_and_static_routes():
+    table = RoutePolicyTable()
+    table.add('/search/{index_name}', Policy.PUBLIC)
+    table.add('/search/admin/stats', Policy.ADMIN)
+    table.add('/files/{file_path:path}', Policy.AUTHENTICATED_ONLY)
+
+    assert table.lookup('/search/laptops') is Policy.PUBLIC
+    assert table.lookup('/search/admin/stats') is Policy.ADMIN
+    # static branch dead-ends, falls back to the param branch
+    assert table.lookup('/search/admin') is Policy.PUBLIC
+    assert table.lookup('/files/a/b/c.json') is Policy.AUTHENTICATED_ONLY
+    assert table.lookup('/unknown') is Policy.AUTHENTICATED
+
+
+def test_conflicting_policies_are_rejected():
+    table = RoutePolicyTable()
+    table.add('/documents/{index_name}', Policy.PUBLIC)
+    with pytest.raises(ValueError):
+        table.add('/documents/{name}', Policy.ADMIN)
+
+
+def test_compiled_from_router_metadata():
+    app = FastAPI()
+    router = APIRouter(prefix='/auth')
+
+    @router.post('/register')
+    @auth_policy(Policy.UNAUTHENTICATED_ONLY)
+    async def register():
+        ...
+
+    @router.get('/users/me')
+    @auth_policy(Policy.AUTHENTICATED_ONLY)
+    async def me():
+        ...
+
+    app.include_router(router)
+    table = compile_app_policies(app)
+
+    assert table.lookup('/auth/register') is Policy.UNAUTHENTICATED_ONLY
+    assert table.lookup('/auth/users/me') is Policy.AUTHENTICATED_ONLY
+    assert table.lookup('/docs') is Policy.PUBLIC
+    assert table.lookup('/openapi.json') is Policy.PUBLIC
+
+
+def test_public_paths_do_not_open_their_templated_route():
+    app = FastAPI()
+
+    @app.post('/documents/{index_name}')
+    async def add_document(index_name: str):
+        ...
+
+    table = compile_app_policies(app, ['/documents/data'])
+
+    assert table.lookup('/documents/data') is Policy.PUBLIC
+    assert table.lookup('/documents/other') is Policy.AUTHENTICATED
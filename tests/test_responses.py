@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import orjson
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from src.presentation.responses import FastJSONResponse, FastJSONRoute
+
+
+class Hit(BaseModel):
+    id: str
+    listed_at: datetime
+    brand_name: str = Field(alias='brand')
+
+
+def build_app() -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = FastJSONRoute
+
+    @app.get('/hits')
+    async def hits():
+        return {'hits': [Hit(id='1', listed_at=datetime(2025, 1, 1), brand='Dell')], 1: 'non-str key'}
+
+    @app.get('/model')
+    def model():
+        return Hit(id='2', listed_at=datetime(2025, 1, 2), brand='Asus')
+
+    @app.post('/created', status_code=201)
+    async def created():
+        return {'status': 'success'}
+
+    @app.post('/cookie')
+    async def cookie(response: Response):
+        response.set_cookie('Bearer-token', 'token')
+        return {'status': 'success'}
+
+    @app.get('/validated', response_model=Hit)
+    async def validated():
+        return {'id': '3', 'listed_at': '2025-01-03T00:00:00', 'brand': 'Apple'}
+
+    return app
+
+
+def test_models_and_values_are_rendered_by_orjson():
+    response = FastJSONResponse({'hit': Hit(id='1', listed_at=datetime(2025, 1, 1), brand='Dell')})
+    assert orjson.loads(response.body) == {'hit': {'id': '1', 'listed_at': '2025-01-01T00:00:00', 'brand': 'Dell'}}
+    assert response.media_type == 'application/json'
+
+
+def test_plain_return_values_skip_jsonable_encoder():
+    client = TestClient(build_app())
+
+    response = client.get('/hits')
+    assert response.status_code == 200
+    assert response.json() == {'hits': [{'id': '1', 'listed_at': '2025-01-01T00:00:00', 'brand': 'Dell'}], '1': 'non-str key'}
+
+    assert client.get('/model').json() == {'id': '2', 'listed_at': '2025-01-02T00:00:00', 'brand': 'Asus'}
+    assert client.post('/created').status_code == 201
+
+
+def test_response_param_and_response_model_keep_fastapi_handling():
+    client = TestClient(build_app())
+
+    response = client.post('/cookie')
+    assert response.json() == {'status': 'success'}
+    assert response.cookies['Bearer-token'] == 'token'
+
+    assert client.get('/validated').json() == {'id': '3', 'listed_at': '2025-01-03T00:00:00', 'brand': 'Apple'}
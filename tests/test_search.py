@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.infrastructure.db.models import UserOrm
+from src.utils.search import SearchMode, escape_like, search_clause
+
+
+def render(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def test_escape_like_escapes_wildcards():
+    assert escape_like('50%_off\\') == '50\\%\\_off\\\\'
+
+
+def test_exact_search_is_equality():
+    assert render(search_clause(UserOrm.username, 'alice')) == "users.username = 'alice'"
+
+
+def test_prefix_search_is_escaped_ilike():
+    # bound, not literal: the postgres dialect doubles % in literals for pyformat
+    clause = search_clause(UserOrm.username, 'al_', SearchMode.PREFIX)
+    compiled = clause.compile(dialect=postgresql.dialect())
+    assert 'ILIKE' in str(compiled) and ' ESCAPE ' in str(compiled)
+    assert clause.modifiers['escape'] == '\\'
+    assert list(compiled.params.values()) == ['al\\_%']
+
+
+def test_fuzzy_search_uses_trigram_operator():
+    assert render(search_clause(UserOrm.email, 'alice', 'fuzzy')).startswith('users.email %')
+
+
+def test_integer_columns_only_support_exact_search():
+    assert render(search_clause(UserOrm.id, '42')) == 'users.id = 42'
+    with pytest.raises(ValueError):
+        search_clause(UserOrm.id, '42', SearchMode.PREFIX)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        search_clause(UserOrm.username, 'alice', 'regex')
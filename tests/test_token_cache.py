@@ -0,0 +1,49 @@
+import pytest
+from jwt import ExpiredSignatureError
+from src.presentation.api.auth_service.token_cache import VerifiedTokenCache
+
+
+def make_cache(now, max_size=2):
+    decoded = []
+
+    def decode(token):
+        decoded.append(token)
+        exp = int(token.split(':')[1])
+        if exp <= now[0]:
+            raise ExpiredSignatureError('Signature has expired')
+        return {'sub': 1, 'exp': exp}
+
+    return VerifiedTokenCache(max_size=max_size, enabled=True, decode=decode, clock=lambda: now[0]), decoded
+
+
+def test_repeat_token_skips_verification():
+    now = [0]
+    cache, decoded = make_cache(now)
+    assert cache.decode('a:100') == {'sub': 1, 'exp': 100}
+    assert cache.decode('a:100') == {'sub': 1, 'exp': 100}
+    assert decoded == ['a:100']
+    assert cache.metrics()['hits'] == 1
+    assert cache.metrics()['misses'] == 1
+
+
+def test_entry_expires_with_token():
+    now = [0]
+    cache, decoded = make_cache(now)
+    cache.decode('a:100')
+    now[0] = 100
+    with pytest.raises(ExpiredSignatureError):
+        cache.decode('a:100')
+    assert decoded == ['a:100', 'a:100']
+
+
+def test_least_recently_used_entry_is_evicted():
+    now = [0]
+    cache, decoded = make_cache(now, max_size=2)
+    cache.decode('a:100')
+    cache.decode('b:100')
+    cache.decode('a:100')
+    cache.decode('c:100')
+    cache.decode('a:100')
+    cache.decode('b:100')
+    assert decoded == ['a:100', 'b:100', 'c:100', 'b:100']
+    assert cache.metrics()['evictions'] == 2
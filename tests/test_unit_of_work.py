@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+
+from src.infrastructure.db.lazy_session import LazySession
+from src.infrastructure.db.models import UserOrm
+from src.utils.UnitOfWork import UnitOfWork
+
+
+class FakeSession:
+    '''Records what the unit of work asks of the real AsyncSession'''
+
+    def __init__(self):
+        self.new, self.dirty, self.deleted = [], [], []
+        self.commits = 0
+        self.closed = False
+        self.active = 0
+        self.max_active = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    def add(self, instance):
+        self.new.append(instance)
+
+    def add_all(self, instances):
+        self.new.extend(instances)
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    sessions = []
+
+    async def open_session(self):
+        await asyncio.sleep(0.01)
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    monkeypatch.setattr(UnitOfWork, '_open_session', open_session)
+    return sessions
+
+
+@pytest.mark.asyncio
+async def test_untouched_unit_of_work_never_opens_a_session(opened):
+    async with UnitOfWork():
+        pass
+    assert opened == []
+
+
+@pytest.mark.asyncio
+async def test_read_only_work_skips_commit(opened):
+    async with UnitOfWork() as uow:
+        await uow._session.execute(select(UserOrm.id))
+    session, = opened
+    assert session.commits == 0 and session.closed
+
+
+@pytest.mark.asyncio
+async def test_writes_are_committed(opened):
+    async with UnitOfWork() as uow:
+        await uow.users.update(1, {'username': 'renamed'})
+    session, = opened
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_statements_share_one_session_one_at_a_time():
+    sessions = []
+
+    async def open_session():
+        await asyncio.sleep(0.01)
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    lazy = LazySession(open_session)
+    await asyncio.gather(*(lazy.execute(update(UserOrm).values(active=True)) for _ in range(3)))
+
+    session, = sessions
+    assert session.max_active == 1
@@ -0,0 +1,33 @@
+from collections import namedtuple
+
+import orjson
+
+from src.application.repositories.PostgresRepository import USER_PUBLIC_FIELDS
+from src.application.services.UserService import to_user_dtos
+from src.presentation.dto.schemas import UserListDto, UserResponseDto
+from src.presentation.responses import FastJSONResponse
+
+
+UserRow = namedtuple('UserRow', USER_PUBLIC_FIELDS)
+
+
+def test_rows_match_validated_dtos():
+    rows = [UserRow(1, 'first', 'first@example.com', True), UserRow(2, 'second', 'second@example.com', False)]
+    users = to_user_dtos(rows)
+    assert users == [UserResponseDto.model_validate(row) for row in rows]
+    assert all(user.model_fields_set == set(USER_PUBLIC_FIELDS) for user in users)
+
+
+def test_database_rows_are_trusted():
+    # rows were validated when written; reading them back does not validate again
+    user, = to_user_dtos([UserRow(1, 'first', 'not-an-email', True)])
+    assert user.email == 'not-an-email'
+
+
+def test_user_list_serializes_like_a_list():
+    users = to_user_dtos([UserRow(1, 'first', 'first@example.com', True)])
+    listing = UserListDto.model_construct(users)
+    assert len(listing) == 1 and listing[0] is users[0] and list(listing) == users
+    assert orjson.loads(FastJSONResponse(listing).body) == [
+        {'id': 1, 'username': 'first', 'email': 'first@example.com', 'active': True}
+    ]